@@ -1,5 +1,9 @@
 """Data models for translation server."""
 
 from .provider_config import ProviderConfig
+from .route_tier import RouteTier
+from .server_config import ServerConfig
+from .tenant_profile import TenantProfile
+from .transport_config import TransportConfig
 
-__all__ = ["ProviderConfig"]
+__all__ = ["ProviderConfig", "RouteTier", "ServerConfig", "TenantProfile", "TransportConfig"]
@@ -1,8 +1,11 @@
 """Provider configuration data model."""
 
-from dataclasses import dataclass
+import argparse
+from dataclasses import dataclass, field
 from typing import Optional
 from ..utils.language_mapper import LanguageMapper
+from .route_tier import RouteTier
+from .transport_config import TransportConfig
 
 
 @dataclass
@@ -14,6 +17,12 @@ class ProviderConfig:
     summary: Optional[str] = None  # アプリケーション概要
     fallback_src_lang: Optional[str] = None  # フォールバック翻訳元言語
     fallback_dst_lang: Optional[str] = None  # フォールバック翻訳先言語
+    routes: list[RouteTier] = field(default_factory=list)  # テキストに応じたモデル切り替え表
+    max_output_tokens: int = 4096  # 出力トークン予算の上限 (打ち切り時の再試行もこの値まで)
+    use_stop_sequence: bool = True  # </translate> を停止シーケンスとして渡す
+    adaptive_output_budget: bool = True  # 出力トークン予算をテキストから見積もる (無効時は常に max_output_tokens)
+    prompt_profile: str = "full"  # プロンプトの形式 (full: 規則をリクエストごとにも送る / compact: 規則はシステムプロンプトのみ)
+    transport: TransportConfig = field(default_factory=TransportConfig)  # HTTPクライアントの接続設定
 
     def __post_init__(self):
         """初期化後の検証"""
@@ -22,3 +31,36 @@ class ProviderConfig:
             LanguageMapper.validate_language_code(self.fallback_src_lang, "Fallback from")
         if self.fallback_dst_lang:
             LanguageMapper.validate_language_code(self.fallback_dst_lang, "Fallback to")
+        if self.max_output_tokens < 1:
+            raise ValueError("Max output tokens must be at least 1")
+        if self.prompt_profile not in ("full", "compact"):
+            raise ValueError(f"Unsupported prompt profile: {self.prompt_profile}")
+
+    @staticmethod
+    def from_args(args: argparse.Namespace) -> "ProviderConfig":
+        """引数から共通設定を作成"""
+        routes_file = getattr(args, "routes", None)
+        # 接続プールは指定がなければサーバーの同時実行数に合わせる
+        pool_size = getattr(args, "pool_size", None) or getattr(args, "max_concurrency", None) or TransportConfig.max_connections
+        transport = TransportConfig(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=getattr(args, "keepalive_expiry", TransportConfig.keepalive_expiry),
+            http2=getattr(args, "http2", False),
+            connect_timeout=getattr(args, "connect_timeout", TransportConfig.connect_timeout),
+            read_timeout=getattr(args, "read_timeout", TransportConfig.read_timeout),
+            max_retries=getattr(args, "max_retries", TransportConfig.max_retries),
+        )
+        return ProviderConfig(
+            provider=args.provider,
+            model=args.model,
+            summary=args.summary,
+            fallback_src_lang=args.fallback_from,
+            fallback_dst_lang=args.fallback_to,
+            routes=RouteTier.load_file(routes_file) if routes_file else [],
+            max_output_tokens=getattr(args, "max_output_tokens", 4096),
+            use_stop_sequence=not getattr(args, "no_stop_sequence", False),
+            adaptive_output_budget=not getattr(args, "fixed_output_budget", False),
+            prompt_profile=getattr(args, "prompt_profile", "full"),
+            transport=transport,
+        )
@@ -0,0 +1,67 @@
+"""Model routing tier data model."""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+# classify_text の分類結果
+TEXT_CLASSES = ("label", "dialogue", "paragraph")
+
+
+@dataclass
+class RouteTier:
+    """テキストの長さ・行数・分類結果でプロバイダ/モデルを切り替えるルーティング段"""
+
+    name: str  # 段の名前 (統計の集計キー)
+    model: Optional[str] = None  # 使用するモデル名 (省略時は既定のモデル)
+    provider: Optional[str] = None  # 使用するプロバイダ名 (省略時は既定のプロバイダ)
+    max_chars: Optional[int] = None  # この文字数以下のテキストに一致
+    max_lines: Optional[int] = None  # この行数以下のテキストに一致
+    text_class: Optional[str] = None  # この分類結果 (label, dialogue, paragraph) のテキストに一致
+    options: dict[str, Any] = field(default_factory=dict)  # プロバイダ固有の引数 (api_key, api_base など)
+
+    def __post_init__(self):
+        """初期化後の検証 (誤記した条件は一致しない段になるため起動時に拒否する)"""
+        if self.text_class is not None and self.text_class not in TEXT_CLASSES:
+            raise ValueError(f"Route tier '{self.name}' text_class must be one of {', '.join(TEXT_CLASSES)}: {self.text_class}")
+        if self.max_chars is not None and self.max_chars < 1:
+            raise ValueError(f"Route tier '{self.name}' max_chars must be at least 1")
+        if self.max_lines is not None and self.max_lines < 1:
+            raise ValueError(f"Route tier '{self.name}' max_lines must be at least 1")
+
+    def matches(self, text: str, text_class: str) -> bool:
+        """テキストがこの段の条件を全て満たすか"""
+        if self.max_chars is not None and len(text) > self.max_chars:
+            return False
+        if self.max_lines is not None and text.count("\n") + 1 > self.max_lines:
+            return False
+        if self.text_class is not None and text_class != self.text_class:
+            return False
+        return True
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> "RouteTier":
+        """辞書からルーティング段を作成"""
+        if "name" not in data:
+            raise ValueError(f"Route tier requires a name: {data}")
+        if not data.get("model") and not data.get("provider"):
+            raise ValueError(f"Route tier '{data['name']}' requires a model or provider")
+        options = {key.replace("-", "_"): value for key, value in data.get("options", {}).items()}
+        return RouteTier(
+            name=data["name"],
+            model=data.get("model"),
+            provider=data.get("provider"),
+            max_chars=data.get("max_chars"),
+            max_lines=data.get("max_lines"),
+            text_class=data.get("text_class"),
+            options=options,
+        )
+
+    @staticmethod
+    def load_file(path: str) -> list["RouteTier"]:
+        """JSONファイルからルーティング表を読み込む (先頭から順に評価される)"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, list):
+            raise ValueError(f"Routing table must be a JSON list: {path}")
+        return [RouteTier.from_dict(item) for item in data]
@@ -0,0 +1,83 @@
+"""Server configuration data model."""
+
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class ServerConfig:
+    """サーバー共通設定"""
+
+    breaker_failure_threshold: int = 5  # サーキットを開くまでの連続失敗回数
+    breaker_slow_call_seconds: float = 0.0  # この秒数を超えた呼び出しを失敗扱いにする (0で無効)
+    breaker_cooldown_seconds: float = 30.0  # オープン状態からハーフオープンへ移行するまでの秒数
+    breaker_half_open_probes: int = 1  # ハーフオープン時に許可する試行数
+    max_concurrency: int = 8  # 同時に上流へ送るリクエスト数
+    max_queue: int = 32  # 上流呼び出し待ちのリクエスト数上限
+    queue_timeout_seconds: float = 10.0  # 待ち行列での最大待機秒数
+    cache_max_entries: int = 10000  # 翻訳キャッシュの最大件数 (0で無効)
+    latency_budget_seconds: float = 0.0  # この秒数内に翻訳できなければ504を返しバックグラウンドで継続 (0で無効)
+    background_workers: int = 8  # バックグラウンド翻訳のワーカー数
+    cache_path: Optional[str] = None  # 共有キャッシュ (SQLite) のファイルパス
+    pack_path: Optional[str] = None  # 読み取り専用の翻訳パックのファイルパス (キャッシュより先に参照)
+    cache_ttl_seconds: float = 0.0  # キャッシュした翻訳の有効期限 (0で無期限)
+    retranslate_per_second: float = 0.0  # 無効化・古い版の翻訳をヒット数の多い順に再翻訳する速度 (0で無効)
+    prefetch_per_second: float = 0.0  # 次に要求されそうなテキストを先読み翻訳する速度 (0で無効)
+    prefetch_reserve_slots: int = 1  # 先読み中も実リクエスト用に空けておく上流の実行枠
+    prefetch_fanout: int = 4  # 1つのテキストから先読みする後続テキストの最大数
+    prefetch_min_confidence: float = 0.2  # 先読みする後続テキストの最小の出現割合
+    prefetch_history_path: Optional[str] = None  # 学習したテキストの遷移を保存するファイル (再起動後も使う)
+    admin_token: Optional[str] = None  # /admin/cache エンドポイントの認証トークン (指定時のみ有効)
+    lease_seconds: float = 60.0  # リースの有効期限 (上流呼び出し中は保持しているワーカーが延長し続ける)
+    lease_poll_seconds: float = 0.05  # 他ワーカーの翻訳完了を確認する間隔
+    workers: int = 1  # プリフォークするワーカープロセス数
+    peers: list[str] = field(default_factory=list)  # キャッシュを共有する他のサーバーインスタンスのURL
+    peer_timeout_seconds: float = 0.3  # ピアへの問い合わせのタイムアウト秒数
+    peer_push: bool = False  # 新しい翻訳をピアへ送る
+    peer_token: Optional[str] = None  # ピア間の内部エンドポイントで使う共有トークン
+    trace_sample_rate: float = 0.0  # 区間ごとの計測を行うリクエストの割合 (0で無効、1で全件)
+    trace_buffer_spans: int = 10000  # /debug/trace で取得できる直近の区間数
+    trace_log_path: Optional[str] = None  # サンプリングしたリクエストを書き出すログファイル (ローテーションあり)
+    pricing_path: Optional[str] = None  # 費用計算に使う料金表 (JSON) のファイルパス
+    usage_summary_seconds: float = 0.0  # トークン使用量の要約を出力する間隔 (0で無効)
+    profiling: bool = False  # プロファイリング用の /debug エンドポイントを有効にする
+    warmup: bool = True  # 起動時にプロバイダへの接続を確立してから正常を報告する
+    warmup_probe: bool = False  # ウォームアップ時に短い翻訳リクエストを送る
+
+    def __post_init__(self):
+        """初期化後の検証"""
+        if self.breaker_failure_threshold < 1:
+            raise ValueError("Breaker failure threshold must be at least 1")
+        if self.breaker_half_open_probes < 1:
+            raise ValueError("Breaker half-open probes must be at least 1")
+        if self.max_concurrency < 1:
+            raise ValueError("Max concurrency must be at least 1")
+        if self.max_queue < 0:
+            raise ValueError("Max queue must not be negative")
+        if self.background_workers < 1:
+            raise ValueError("Background workers must be at least 1")
+        if self.workers < 1:
+            raise ValueError("Workers must be at least 1")
+        if self.workers > 1 and not self.cache_path:
+            raise ValueError("Multiple workers require a shared cache (--cache-path)")
+        if not 0.0 <= self.trace_sample_rate <= 1.0:
+            raise ValueError("Trace sample rate must be between 0 and 1")
+        if self.peer_push and not self.peer_token:
+            raise ValueError("Peer push requires a peer token (peers only accept pushed translations with a token)")
+        if self.peer_timeout_seconds <= 0:
+            raise ValueError("Peer timeout must be positive")
+        if self.cache_ttl_seconds < 0:
+            raise ValueError("Cache TTL must not be negative")
+        if self.retranslate_per_second < 0:
+            raise ValueError("Re-translation rate must not be negative")
+        if self.prefetch_per_second < 0:
+            raise ValueError("Prefetch rate must not be negative")
+        if self.prefetch_per_second > 0 and self.workers > 1:
+            # リクエストはどのワーカーに届くか決まらず、各ワーカーには要求順の一部しか見えないため学習できない
+            raise ValueError("Prefetch requires a single worker (each worker would only see part of every client's request order)")
+        if self.prefetch_per_second > 0 and not 0 <= self.prefetch_reserve_slots < self.max_concurrency:
+            raise ValueError("Prefetch reserve must be between 0 and max concurrency - 1")
+        if self.prefetch_fanout < 1:
+            raise ValueError("Prefetch fanout must be at least 1")
+        if not 0.0 < self.prefetch_min_confidence <= 1.0:
+            raise ValueError("Prefetch confidence must be greater than 0 and at most 1")
@@ -0,0 +1,86 @@
+"""Tenant (per-game) profile data model."""
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from ..utils.language_mapper import LanguageMapper
+from .route_tier import RouteTier
+
+DEFAULT_PROFILE = "default"
+
+
+def namespace_of(profile: str) -> str:
+    """プロファイルのキャッシュの名前空間 (既定のプロファイルは名前空間なし)"""
+    return "" if profile == DEFAULT_PROFILE else profile
+
+
+def profile_of(namespace: str) -> str:
+    """キャッシュの名前空間のプロファイル名"""
+    return namespace if namespace else DEFAULT_PROFILE
+
+
+@dataclass
+class TenantProfile:
+    """1つのサーバーで扱うゲームごとの設定 (/p/<name>/translate または ?profile=<name> で選択)"""
+
+    name: str  # プロファイル名 (URLとキャッシュの名前空間に使う)
+    model: Optional[str] = None  # 使用するモデル名 (省略時は既定のモデル)
+    provider: Optional[str] = None  # 使用するプロバイダ名 (省略時は既定のプロバイダ)
+    summary: Optional[str] = None  # アプリケーション概要 (省略時は既定の概要)
+    fallback_src_lang: Optional[str] = None  # フォールバック翻訳元言語
+    fallback_dst_lang: Optional[str] = None  # フォールバック翻訳先言語
+    weight: float = 1.0  # 上流呼び出しの待ち行列での重み (大きいほど多く割り当てる)
+    rate_per_second: float = 0.0  # 上流呼び出しの1秒あたりの上限 (0で無制限)
+    burst: Optional[int] = None  # 瞬間的に許可する呼び出し数 (省略時は1秒分)
+    routes: list[RouteTier] = field(default_factory=list)  # このプロファイルのルーティング表
+    pack_path: Optional[str] = None  # このプロファイルの翻訳パック
+    ttl_seconds: Optional[float] = None  # キャッシュの有効期限 (秒、省略時は --cache-ttl)
+    options: dict[str, Any] = field(default_factory=dict)  # プロバイダ固有の引数 (api_key, api_base など)
+
+    def __post_init__(self):
+        """初期化後の検証"""
+        if not re.fullmatch(r"[A-Za-z0-9_.-]+", self.name):
+            raise ValueError(f"Profile name may only contain letters, digits, '_', '.' and '-': {self.name}")
+        if self.name == DEFAULT_PROFILE:
+            raise ValueError(f"Profile name '{DEFAULT_PROFILE}' is reserved for the command line settings")
+        if self.weight <= 0:
+            raise ValueError(f"Profile '{self.name}' weight must be positive")
+        if self.rate_per_second < 0:
+            raise ValueError(f"Profile '{self.name}' rate must not be negative")
+        if self.ttl_seconds is not None and self.ttl_seconds < 0:
+            raise ValueError(f"Profile '{self.name}' ttl must not be negative")
+        if self.fallback_src_lang:
+            LanguageMapper.validate_language_code(self.fallback_src_lang, "Fallback from")
+        if self.fallback_dst_lang:
+            LanguageMapper.validate_language_code(self.fallback_dst_lang, "Fallback to")
+
+    @staticmethod
+    def from_dict(name: str, data: dict[str, Any]) -> "TenantProfile":
+        """辞書からプロファイルを作成"""
+        options = {key.replace("-", "_"): value for key, value in data.get("options", {}).items()}
+        routes_file = data.get("routes")
+        return TenantProfile(
+            name=name,
+            model=data.get("model"),
+            provider=data.get("provider"),
+            summary=data.get("summary"),
+            fallback_src_lang=data.get("fallback_from"),
+            fallback_dst_lang=data.get("fallback_to"),
+            weight=float(data.get("weight", 1.0)),
+            rate_per_second=float(data.get("rate", 0.0)),
+            burst=data.get("burst"),
+            routes=RouteTier.load_file(routes_file) if routes_file else [],
+            pack_path=data.get("pack"),
+            ttl_seconds=float(data["ttl"]) if data.get("ttl") is not None else None,
+            options=options,
+        )
+
+    @staticmethod
+    def load_file(path: str) -> list["TenantProfile"]:
+        """JSONファイル (プロファイル名 -> 設定) からプロファイル一覧を読み込む"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"Profiles file must be a JSON object of profile name to settings: {path}")
+        return [TenantProfile.from_dict(name, settings) for name, settings in data.items()]
@@ -0,0 +1,27 @@
+"""HTTP transport configuration data model."""
+
+from dataclasses import dataclass
+
+
+@dataclass
+class TransportConfig:
+    """プロバイダ用HTTPクライアントの接続設定"""
+
+    max_connections: int = 8  # 接続プールの最大接続数 (サーバーの同時実行数に合わせる)
+    max_keepalive_connections: int = 8  # プールに保持するアイドル接続数
+    keepalive_expiry: float = 120.0  # アイドル接続を保持する秒数
+    http2: bool = False  # HTTP/2 を使う (h2 パッケージが必要)
+    connect_timeout: float = 5.0  # 接続タイムアウト秒数
+    read_timeout: float = 60.0  # 読み込みタイムアウト秒数
+    max_retries: int = 2  # SDK側の自動再試行回数
+
+    def __post_init__(self):
+        """初期化後の検証"""
+        if self.max_connections < 1:
+            raise ValueError("Max connections must be at least 1")
+        if self.max_keepalive_connections < 0:
+            raise ValueError("Max keep-alive connections must not be negative")
+        if self.connect_timeout <= 0 or self.read_timeout <= 0:
+            raise ValueError("Timeouts must be positive")
+        if self.max_retries < 0:
+            raise ValueError("Max retries must not be negative")
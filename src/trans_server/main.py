@@ -3,35 +3,14 @@
 import argparse
 import sys
 import traceback
-from typing import Type
+from .data_models import RouteTier, ServerConfig, TenantProfile
 from .providers.base_provider import BaseProvider
-from .providers.openai_provider import OpenAIProvider
-from .providers.openai_compatible_provider import OpenAICompatibleProvider
-from .providers.anthropic_provider import AnthropicProvider
-from .providers.anthropic_compatible_provider import AnthropicCompatibleProvider
-from .providers.ollama_provider import OllamaProvider
-from .providers.gemini_provider import GeminiProvider
+from .providers.registry import available_providers, get_provider_class
+from .mods.model_router import ModelRouter
+from .mods.tenant import Tenant
 from .mods.translation_server import TranslationServer
 
 
-def get_provider_class(provider_name: str) -> Type[BaseProvider]:
-    """Get provider class from provider name"""
-    provider_map = {
-        "anthropic": AnthropicProvider,
-        "anthropic-compatible": AnthropicCompatibleProvider,
-        "openai": OpenAIProvider,
-        "openai-compatible": OpenAICompatibleProvider,
-        "gemini": GeminiProvider,
-        "ollama": OllamaProvider,
-    }
-
-    provider_class = provider_map.get(provider_name.lower())
-    if not provider_class:
-        raise ValueError(f"Unsupported provider: {provider_name}")
-
-    return provider_class
-
-
 def list_models_and_exit(provider: BaseProvider):
     """List available models and exit"""
     try:
@@ -70,17 +49,97 @@ Examples:
     parser.add_argument(
         "--provider",
         required=True,
-        choices=["openai", "openai-compatible", "anthropic", "anthropic-compatible", "ollama", "gemini"],
+        choices=available_providers(),
         help="Translation provider",
     )
     parser.add_argument("--model", help="Model name (not required with --list-models)")
     parser.add_argument("--summary", help="Application summary (improves translation accuracy)")
     parser.add_argument("--fallback-from", help="Fallback source language code (e.g., ja)")
     parser.add_argument("--fallback-to", help="Fallback target language code (e.g., en)")
+    parser.add_argument("--routes", help="JSON routing table that selects provider/model by text length, line count or text class")
+    parser.add_argument("--profiles", help="JSON file of per-game profiles served at /p/<name>/translate (model, summary, cache namespace, rate budget)")
+    parser.add_argument("--max-output-tokens", type=int, default=4096, help="Upper limit of the per-request output token budget (default: 4096)")
+    parser.add_argument(
+        "--prompt-profile",
+        choices=["full", "compact"],
+        default="full",
+        help="Prompt format: full repeats the rules in every request, compact keeps them only in the system prompt (default: full)",
+    )
+    parser.add_argument("--no-stop-sequence", action="store_true", help="Do not pass </translate> as a stop sequence (for models that reject stop sequences)")
+    parser.add_argument(
+        "--fixed-output-budget",
+        action="store_true",
+        help="Always use --max-output-tokens instead of a budget estimated from the text (for models that spend output tokens on reasoning)",
+    )
     parser.add_argument("--list-models", action="store_true", help="List available models and exit")
     parser.add_argument("--host", help="Server bind address (required for server startup)")
     parser.add_argument("--port", type=int, help="Server port (required for server startup)")
 
+    # Load protection parameters
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Maximum concurrent upstream requests (default: 8)")
+    parser.add_argument("--max-queue", type=int, default=32, help="Maximum requests waiting for an upstream slot before fast-failing with 429 (default: 32)")
+    parser.add_argument("--queue-timeout", type=float, default=10.0, help="Maximum seconds a request waits in the queue (default: 10)")
+    parser.add_argument("--breaker-failures", type=int, default=5, help="Consecutive failures that open the circuit breaker (default: 5)")
+    parser.add_argument("--breaker-slow-call", type=float, default=0.0, help="Treat calls slower than this many seconds as failures (default: 0, disabled)")
+    parser.add_argument("--breaker-cooldown", type=float, default=30.0, help="Seconds the circuit stays open before a half-open probe (default: 30)")
+
+    # HTTP transport parameters
+    parser.add_argument("--pool-size", type=int, help="HTTP connection pool size per provider client (default: --max-concurrency)")
+    parser.add_argument("--keepalive-expiry", type=float, default=120.0, help="Seconds idle connections are kept alive (default: 120)")
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 where supported (requires the h2 package)")
+    parser.add_argument("--connect-timeout", type=float, default=5.0, help="Connect timeout in seconds (default: 5)")
+    parser.add_argument("--read-timeout", type=float, default=60.0, help="Read timeout in seconds (default: 60)")
+    parser.add_argument("--max-retries", type=int, default=2, help="Automatic retries inside the provider SDK (default: 2)")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip opening provider connections before reporting healthy")
+    parser.add_argument("--warmup-probe", action="store_true", help="Send a short translation to each provider during warmup")
+
+    # Cache and latency parameters
+    parser.add_argument("--cache-size", type=int, default=10000, help="Maximum number of cached translations (default: 10000, 0 disables)")
+    parser.add_argument(
+        "--latency-budget",
+        type=float,
+        default=0.0,
+        help="Return 504 if a translation takes longer than this many seconds and finish it in the background (default: 0, disabled)",
+    )
+    parser.add_argument("--background-workers", type=int, default=8, help="Worker threads for background translations (default: 8)")
+    parser.add_argument("--cache-path", help="SQLite file for a translation cache shared by all workers (persists across restarts)")
+    parser.add_argument("--pack", help="Read-only translation pack built with XUnity_Translate_Pack (checked before the cache)")
+    parser.add_argument("--workers", type=int, default=1, help="Pre-forked worker processes (default: 1, POSIX only, requires --cache-path)")
+    parser.add_argument("--cache-ttl", type=float, default=0.0, help="Seconds a cached translation stays valid (default: 0, no expiry)")
+    parser.add_argument(
+        "--retranslate",
+        type=float,
+        default=0.0,
+        help="Re-translate invalidated and outdated cache entries, most hit first, at up to N per second while idle (default: 0, disabled)",
+    )
+    parser.add_argument("--admin-token", help="Enable the /admin/cache endpoints, authenticated with this token in the X-Admin-Token header")
+
+    # Prefetch parameters
+    parser.add_argument(
+        "--prefetch",
+        type=float,
+        default=0.0,
+        help="Learn which strings follow each other and translate likely next strings ahead, at up to N per second (default: 0, disabled)",
+    )
+    parser.add_argument("--prefetch-reserve", type=int, default=1, help="Upstream slots always left free for live requests (default: 1)")
+    parser.add_argument("--prefetch-fanout", type=int, default=4, help="Maximum predicted next strings per request (default: 4)")
+    parser.add_argument("--prefetch-confidence", type=float, default=0.2, help="Minimum share of observed transitions for a prediction, 0 to 1 (default: 0.2)")
+    parser.add_argument("--prefetch-history", help="JSON file the learned transitions are loaded from at startup and saved to every minute")
+
+    # Tracing parameters
+    parser.add_argument("--trace-sample", type=float, default=0.0, help="Fraction of requests traced per stage, 0 to 1 (default: 0, disabled)")
+    parser.add_argument("--trace-buffer", type=int, default=10000, help="Recent spans kept for GET /debug/trace (default: 10000)")
+    parser.add_argument("--trace-log", help="JSON lines file for sampled request traces (rotated at 10MB, one file per worker with --workers)")
+    parser.add_argument("--pricing", help="JSON price table (USD per 1M tokens by model) for cost figures in /stats/usage")
+    parser.add_argument("--usage-summary", type=float, default=0.0, help="Print a token usage summary every N seconds (default: 0, disabled)")
+    parser.add_argument("--profiling", action="store_true", help="Enable the CPU and memory profiling endpoints under /debug (do not expose publicly)")
+
+    # Peer cache parameters
+    parser.add_argument("--peers", help="Comma-separated base URLs of other translation servers to share cached translations with")
+    parser.add_argument("--peer-timeout", type=float, default=0.3, help="Timeout in seconds for peer cache lookups (default: 0.3)")
+    parser.add_argument("--peer-push", action="store_true", help="Push new translations to all peers")
+    parser.add_argument("--peer-token", help="Shared token required on the internal peer cache endpoints")
+
     # Parse common arguments first (to identify provider)
     args, _ = parser.parse_known_args()
 
@@ -103,6 +162,94 @@ Examples:
     return args
 
 
+def build_server_config(args: argparse.Namespace) -> ServerConfig:
+    """Create server configuration from arguments"""
+    return ServerConfig(
+        breaker_failure_threshold=args.breaker_failures,
+        breaker_slow_call_seconds=args.breaker_slow_call,
+        breaker_cooldown_seconds=args.breaker_cooldown,
+        max_concurrency=args.max_concurrency,
+        max_queue=args.max_queue,
+        queue_timeout_seconds=args.queue_timeout,
+        cache_max_entries=args.cache_size,
+        latency_budget_seconds=args.latency_budget,
+        background_workers=args.background_workers,
+        cache_path=args.cache_path,
+        cache_ttl_seconds=args.cache_ttl,
+        retranslate_per_second=args.retranslate,
+        admin_token=args.admin_token,
+        prefetch_per_second=args.prefetch,
+        prefetch_reserve_slots=args.prefetch_reserve,
+        prefetch_fanout=args.prefetch_fanout,
+        prefetch_min_confidence=args.prefetch_confidence,
+        prefetch_history_path=args.prefetch_history,
+        pack_path=args.pack,
+        workers=args.workers,
+        peers=[peer.strip() for peer in args.peers.split(",") if peer.strip()] if args.peers else [],
+        peer_timeout_seconds=args.peer_timeout,
+        peer_push=args.peer_push,
+        peer_token=args.peer_token,
+        trace_sample_rate=args.trace_sample,
+        trace_buffer_spans=args.trace_buffer,
+        trace_log_path=args.trace_log,
+        pricing_path=args.pricing,
+        usage_summary_seconds=args.usage_summary,
+        profiling=args.profiling,
+        warmup=not args.no_warmup,
+        warmup_probe=args.warmup_probe,
+    )
+
+
+def create_route_provider(args: argparse.Namespace, tier: RouteTier) -> BaseProvider:
+    """Create provider instance for a routing tier (tier options override the command line arguments)"""
+    tier_args = vars(args).copy()
+    tier_args.update(tier.options)
+    tier_args["provider"] = tier.provider if tier.provider else args.provider
+    tier_args["model"] = tier.model if tier.model else args.model
+    tier_args["routes"] = None
+    provider_class = get_provider_class(tier_args["provider"])
+    return provider_class.create_from_args(argparse.Namespace(**tier_args))
+
+
+def profile_arguments(args: argparse.Namespace, profile: TenantProfile) -> argparse.Namespace:
+    """Command line arguments with a profile's settings applied (profile options override the command line arguments)"""
+    profile_args = vars(args).copy()
+    profile_args.update(profile.options)
+    profile_args["provider"] = profile.provider if profile.provider else args.provider
+    profile_args["model"] = profile.model if profile.model else args.model
+    if profile.summary is not None:
+        profile_args["summary"] = profile.summary
+    if profile.fallback_src_lang:
+        profile_args["fallback_from"] = profile.fallback_src_lang
+    if profile.fallback_dst_lang:
+        profile_args["fallback_to"] = profile.fallback_dst_lang
+    profile_args["routes"] = None
+    return argparse.Namespace(**profile_args)
+
+
+def create_profile_provider(args: argparse.Namespace, profile: TenantProfile) -> BaseProvider:
+    """Create provider instance for a profile that uses another provider or provider options"""
+    profile_args = profile_arguments(args, profile)
+    provider_class = get_provider_class(profile_args.provider)
+    return provider_class.create_from_args(profile_args)
+
+
+def create_tenants(args: argparse.Namespace, provider: BaseProvider) -> list[Tenant]:
+    """Create the profiles listed in --profiles"""
+    if not args.profiles:
+        return []
+    return [
+        Tenant.from_profile(
+            profile,
+            provider,
+            lambda profile: create_profile_provider(args, profile),
+            lambda tier, profile=profile: create_route_provider(profile_arguments(args, profile), tier),
+            workers=args.workers,
+        )
+        for profile in TenantProfile.load_file(args.profiles)
+    ]
+
+
 def main():
     """Main entry point"""
     args = parse_arguments()
@@ -118,7 +265,8 @@ def main():
             return
 
         # Start server
-        server = TranslationServer(provider)
+        router = ModelRouter(provider, provider.config.routes, lambda tier: create_route_provider(args, tier))
+        server = TranslationServer(provider, build_server_config(args), router, create_tenants(args, provider))
         server.start(args.host, args.port)
 
     except KeyboardInterrupt:
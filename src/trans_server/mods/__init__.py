@@ -1,7 +1,43 @@
 """Modules for translation processing."""
 
+from .admission_controller import AdmissionController, ServerSaturatedError
+from .cache_admin_api import CacheAdminApi
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .fair_queue import FairQueue
+from .model_router import ModelRouter, TierStats
+from .peer_cache import PeerCache
+from .prefetcher import Prefetcher, SuccessorModel
 from .prompt_builder import PromptBuilder
-from .text_filter import is_dynamic_value, should_skip_translation
+from .rate_limiter import RateLimitExceededError, TokenBucket
+from .tenant import Tenant
+from .text_filter import classify_text, is_dynamic_value, should_skip_translation
+from .translation_cache import SqliteTranslationCache, TranslationCache
+from .translation_pack import TranslationPack
 from .translation_server import TranslationServer
+from .usage_tracker import UsageTracker
 
-__all__ = ["PromptBuilder", "TranslationServer", "is_dynamic_value", "should_skip_translation"]
+__all__ = [
+    "AdmissionController",
+    "CacheAdminApi",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "FairQueue",
+    "ModelRouter",
+    "PeerCache",
+    "Prefetcher",
+    "PromptBuilder",
+    "RateLimitExceededError",
+    "ServerSaturatedError",
+    "SqliteTranslationCache",
+    "SuccessorModel",
+    "Tenant",
+    "TierStats",
+    "TokenBucket",
+    "TranslationCache",
+    "TranslationPack",
+    "TranslationServer",
+    "UsageTracker",
+    "classify_text",
+    "is_dynamic_value",
+    "should_skip_translation",
+]
@@ -0,0 +1,137 @@
+"""Queue-depth based admission control for upstream calls."""
+
+import heapq
+import threading
+import time
+from collections import Counter
+
+
+class ServerSaturatedError(Exception):
+    """同時実行枠と待ち行列が埋まっているため受け付けを拒否した"""
+
+
+class _Waiter:
+    """待ち行列の1件 (仮想終了時刻の小さい順に実行枠を割り当てる)"""
+
+    __slots__ = ("finish", "sequence", "flow", "granted")
+
+    def __init__(self, finish: float, sequence: int, flow: str):
+        self.finish = finish
+        self.sequence = sequence
+        self.flow = flow
+        self.granted = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.finish, self.sequence) < (other.finish, other.sequence)
+
+
+class AdmissionController:
+    """上流呼び出しの同時実行数と待ち行列の長さを制限
+
+    同時実行枠に空きがなければ待ち行列に入り、待ち行列も埋まっていれば即座に拒否する。
+    待ち行列は重み付き公平キューイング (WFQ) で、フロー (プロファイル) ごとの重みに比例して実行枠を割り当てる。
+    あるフローに大量のリクエストが溜まっても、他のフローのリクエストは追い越して実行される。
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._queue: list[_Waiter] = []
+        self._waiting_by_flow: Counter[str] = Counter()
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._sequence = 0
+        self._total_rejections = 0
+
+    def acquire(self, flow: str = "", weight: float = 1.0):
+        """実行枠を取得
+
+        Args:
+            flow: 公平に扱う単位 (プロファイル名)
+            weight: フローの重み (大きいほど多く割り当てる)
+
+        Raises:
+            ServerSaturatedError: 待ち行列が満杯、または待機がタイムアウトした
+        """
+        with self._condition:
+            if self._in_flight < self.max_concurrency and not self._queue:
+                self._in_flight += 1
+                return
+
+            if len(self._queue) >= self.max_queue:
+                self._total_rejections += 1
+                raise ServerSaturatedError(f"Queue is full ({len(self._queue)} waiting)")
+
+            # 仮想終了時刻 = max(現在の仮想時刻, 同じフローの直前の終了時刻) + 1/重み
+            start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+            self._sequence += 1
+            waiter = _Waiter(start + 1.0 / weight, self._sequence, flow)
+            self._last_finish[flow] = waiter.finish
+            heapq.heappush(self._queue, waiter)
+            self._waiting_by_flow[flow] += 1
+
+            try:
+                deadline = time.monotonic() + self.queue_timeout_seconds
+                while not waiter.granted:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._queue.remove(waiter)
+                        heapq.heapify(self._queue)
+                        self._total_rejections += 1
+                        raise ServerSaturatedError(f"Timed out after {self.queue_timeout_seconds}sec in queue")
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting_by_flow[flow] -= 1
+                if not self._waiting_by_flow[flow]:
+                    del self._waiting_by_flow[flow]
+
+    def _dispatch(self):
+        """空いた実行枠を仮想終了時刻の小さい待機から順に割り当てる"""
+        granted = False
+        while self._queue and self._in_flight < self.max_concurrency:
+            waiter = heapq.heappop(self._queue)
+            waiter.granted = True
+            self._virtual_time = waiter.finish
+            self._in_flight += 1
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def release(self):
+        """実行枠を返却"""
+        with self._condition:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @property
+    def saturated(self) -> bool:
+        """新規リクエストが即座に拒否される状態か"""
+        with self._condition:
+            return self._in_flight >= self.max_concurrency and len(self._queue) >= self.max_queue
+
+    @property
+    def spare_slots(self) -> int:
+        """すぐに使える実行枠の数 (待機中のリクエストがあれば0)"""
+        with self._condition:
+            return 0 if self._queue else max(0, self.max_concurrency - self._in_flight)
+
+    @property
+    def has_capacity(self) -> bool:
+        """待機中のリクエストがなく実行枠が空いているか (バックグラウンド処理はこの間だけ上流を使う)"""
+        return self.spare_slots > 0
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": len(self._queue),
+                "waiting_by_flow": {flow or "default": count for flow, count in self._waiting_by_flow.items()},
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "total_rejections": self._total_rejections,
+            }
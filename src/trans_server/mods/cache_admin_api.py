@@ -0,0 +1,119 @@
+"""Cache administration endpoints."""
+
+import hmac
+from typing import Callable
+from flask import Flask, jsonify, request
+from ..data_models.tenant_profile import namespace_of, profile_of
+from .tenant import Tenant
+from .translation_cache import SqliteTranslationCache, TranslationCache
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+class CacheAdminApi:
+    """/admin/cache 以下のキャッシュ管理API (管理トークンを指定したときだけ登録する)"""
+
+    def __init__(
+        self,
+        cache: TranslationCache | SqliteTranslationCache,
+        tenants: dict[str, Tenant],
+        admin_token: str,
+        retranslation_stats: Callable[[], dict],
+    ):
+        self.cache = cache
+        self.tenants = tenants
+        self.admin_token = admin_token
+        # 再翻訳の件数はサーバー側で数えるため、サマリーの作成時に取得する
+        self.retranslation_stats = retranslation_stats
+
+    def register(self, app: Flask):
+        """Register the admin routes"""
+        app.route("/admin/cache", methods=["GET"])(self.handle_cache_summary)
+        app.route("/admin/cache/entries", methods=["GET"])(self.handle_cache_entries)
+        app.route("/admin/cache/invalidate", methods=["POST"])(self.handle_cache_invalidate)
+        app.route("/admin/cache/compact", methods=["POST"])(self.handle_cache_compact)
+
+    def _authorized(self) -> bool:
+        """Check the admin token of the current request"""
+        token = request.headers.get(ADMIN_TOKEN_HEADER, "")
+        return hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8"))
+
+    @staticmethod
+    def _with_profile(item: dict) -> dict:
+        """Replace the cache namespace with the profile name"""
+        namespace = item.pop("namespace")
+        return {"profile": profile_of(namespace), **item}
+
+    def handle_cache_summary(self):
+        """Cache entries, hits and expired entries per profile, language pair and version
+
+        GET /admin/cache
+        """
+        if not self._authorized():
+            return "", 403, {"Content-Type": "text/plain; charset=utf-8"}
+
+        versions = {name: tenant.version for name, tenant in self.tenants.items()}
+        groups = [self._with_profile(group) for group in self.cache.summary()]
+        for group in groups:
+            group["current"] = group["version"] is not None and group["version"] == versions.get(group["profile"])
+        summary = {
+            "cache": self.cache.snapshot(),
+            "versions": versions,
+            "groups": sorted(groups, key=lambda group: (group["profile"], group["from"], group["to"], not group["current"])),
+            "retranslation": self.retranslation_stats(),
+        }
+        return jsonify(summary), 200
+
+    def handle_cache_entries(self):
+        """Search cached translations, most hit first
+
+        GET /admin/cache/entries?q={glob}&profile={name}&from={source_lang}&to={target_lang}&limit=50
+        """
+        if not self._authorized():
+            return "", 403, {"Content-Type": "text/plain; charset=utf-8"}
+
+        profile = request.args.get("profile")
+        entries = self.cache.search(
+            request.args.get("q"),
+            namespace_of(profile) if profile else None,
+            request.args.get("from"),
+            request.args.get("to"),
+            limit=request.args.get("limit", 50, type=int),
+        )
+        return jsonify([self._with_profile(entry) for entry in entries]), 200
+
+    def handle_cache_invalidate(self):
+        """Invalidate cached translations (kept as re-translation candidates until compacted)
+
+        POST /admin/cache/invalidate  {"profile": ..., "from": ..., "to": ..., "pattern": ...}  (at least one filter)
+        """
+        if not self._authorized():
+            return "", 403, {"Content-Type": "text/plain; charset=utf-8"}
+
+        payload = request.get_json(silent=True) or {}
+        filters = {key: payload.get(key) for key in ("profile", "from", "to", "pattern")}
+        if not any(filters.values()) or not all(value is None or isinstance(value, str) for value in filters.values()):
+            return "At least one of profile, from, to or pattern is required", 400, {"Content-Type": "text/plain; charset=utf-8"}
+
+        count = self.cache.invalidate(
+            namespace_of(filters["profile"]) if filters["profile"] else None,
+            filters["from"],
+            filters["to"],
+            filters["pattern"],
+        )
+        print(f"Cache invalidated: {count} entries ({', '.join(f'{key}={value}' for key, value in filters.items() if value)})")
+        return jsonify({"invalidated": count}), 200
+
+    def handle_cache_compact(self):
+        """Delete invalidated and expired entries (and outdated versions with "stale": true)
+
+        POST /admin/cache/compact  {"stale": false, "vacuum": false}
+        """
+        if not self._authorized():
+            return "", 403, {"Content-Type": "text/plain; charset=utf-8"}
+
+        payload = request.get_json(silent=True) or {}
+        current_versions = {tenant.namespace: tenant.version for tenant in self.tenants.values()} if payload.get("stale") else None
+        removed = self.cache.compact(current_versions, vacuum=bool(payload.get("vacuum")))
+        print(f"Cache compacted: {removed} entries removed")
+        return jsonify({"removed": removed}), 200
@@ -0,0 +1,131 @@
+"""Circuit breaker for upstream providers."""
+
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """サーキットがオープン状態のため呼び出しを拒否した"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:  # pylint: disable=too-many-instance-attributes
+    """プロバイダ単位のサーキットブレーカー
+
+    closed: 通常状態。連続失敗が閾値に達すると open へ移行
+    open: 全呼び出しを即座に拒否。クールダウン後に half_open へ移行
+    half_open: 限られた数の試行のみ許可。成功で closed、失敗で open へ戻る
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, slow_call_seconds: float = 0.0, cooldown_seconds: float = 30.0, half_open_probes: int = 1):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.half_open_probes = half_open_probes
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._total_failures = 0
+        self._total_rejections = 0
+
+    @property
+    def state(self) -> str:
+        """現在の状態 (クールダウン経過を反映)"""
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def _refresh_state(self):
+        """クールダウンが経過していれば half_open へ移行 (ロック保持中に呼ぶこと)"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+
+    def _open(self):
+        """open 状態へ移行 (ロック保持中に呼ぶこと)"""
+        if self._state != self.OPEN:
+            print(f"[{self.name}] Circuit opened after {self._consecutive_failures} failure(s)")
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probes_in_flight = 0
+
+    def before_call(self):
+        """呼び出し前の確認
+
+        Raises:
+            CircuitOpenError: オープン中、またはハーフオープンの試行枠が埋まっている
+        """
+        with self._lock:
+            self._refresh_state()
+            if self._state == self.OPEN:
+                self._total_rejections += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is open", self._retry_after())
+            if self._state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self._total_rejections += 1
+                    raise CircuitOpenError(f"Circuit for {self.name} is half-open and probing", self._retry_after())
+                self._probes_in_flight += 1
+
+    def record_success(self, elapsed_seconds: float):
+        """呼び出し成功を記録 (遅延が閾値を超えた場合は失敗扱い)"""
+        if 0 < self.slow_call_seconds < elapsed_seconds:
+            self.record_failure()
+            return
+
+        with self._lock:
+            if self._state == self.OPEN:
+                # オープン前に始まった呼び出しの遅れた成功では閉じない (ハーフオープンの試行を経る)
+                return
+            if self._state == self.HALF_OPEN:
+                print(f"[{self.name}] Circuit closed")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._probes_in_flight = 0
+
+    def record_failure(self):
+        """呼び出し失敗を記録"""
+        with self._lock:
+            self._consecutive_failures += 1
+            self._total_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release_probe(self):
+        """結果を記録せずに試行枠を返却 (上流へ到達しなかった呼び出し用)"""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+                self._probes_in_flight -= 1
+
+    def _retry_after(self) -> int:
+        """再試行までの目安秒数 (ロック保持中に呼ぶこと)"""
+        if self._state != self.OPEN:
+            return 1
+        remaining = self.cooldown_seconds - (time.monotonic() - self._opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def retry_after(self) -> int:
+        """再試行までの目安秒数"""
+        with self._lock:
+            return self._retry_after()
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._lock:
+            self._refresh_state()
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "total_failures": self._total_failures,
+                "total_rejections": self._total_rejections,
+            }
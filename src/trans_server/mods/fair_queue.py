@@ -0,0 +1,71 @@
+"""Weighted fair queue of background jobs."""
+
+import heapq
+import threading
+from collections import Counter
+from typing import Any
+
+
+class _Job:
+    """待ち行列の1件 (仮想終了時刻の小さい順に取り出す)"""
+
+    __slots__ = ("finish", "sequence", "flow", "item")
+
+    def __init__(self, finish: float, sequence: int, flow: str, item: Any):
+        self.finish = finish
+        self.sequence = sequence
+        self.flow = flow
+        self.item = item
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.finish, self.sequence) < (other.finish, other.sequence)
+
+
+class FairQueue:
+    """フロー (プロファイル) ごとの重みに比例して取り出す待ち行列
+
+    AdmissionController と同じ重み付き公平キューイング (WFQ) で、
+    あるフローが大量に積んだジョブの後ろに他のフローのジョブが並ばないようにする。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: list[_Job] = []
+        self._waiting_by_flow: Counter[str] = Counter()
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._sequence = 0
+
+    def put(self, flow: str, weight: float, item: Any):
+        """ジョブを追加"""
+        with self._lock:
+            # 仮想終了時刻 = max(現在の仮想時刻, 同じフローの直前の終了時刻) + 1/重み
+            start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+            self._sequence += 1
+            job = _Job(start + 1.0 / weight, self._sequence, flow, item)
+            self._last_finish[flow] = job.finish
+            heapq.heappush(self._queue, job)
+            self._waiting_by_flow[flow] += 1
+
+    def get(self) -> Any:
+        """仮想終了時刻の最も小さいジョブを取り出す
+
+        Raises:
+            IndexError: 待ち行列が空
+        """
+        with self._lock:
+            job = heapq.heappop(self._queue)
+            self._virtual_time = job.finish
+            self._waiting_by_flow[job.flow] -= 1
+            if not self._waiting_by_flow[job.flow]:
+                del self._waiting_by_flow[job.flow]
+            return job.item
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def snapshot(self) -> dict:
+        """フローごとの待ち件数 (ヘルスチェック用)"""
+        with self._lock:
+            return {flow or "default": count for flow, count in self._waiting_by_flow.items()}
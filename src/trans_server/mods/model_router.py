@@ -0,0 +1,138 @@
+"""Model cascade routing by text length, line count and class."""
+
+import threading
+from collections import deque
+from typing import Callable, Optional
+from ..data_models import RouteTier
+from ..providers.base_provider import BaseProvider
+from ..utils.token_estimator import TokenEstimator
+from ..utils.usage import Usage
+from .text_filter import classify_text
+
+DEFAULT_TIER = "default"
+
+
+class TierStats:
+    """ルーティング段ごとの遅延・トークン数の統計 (閾値の調整用)"""
+
+    LATENCY_SAMPLES = 1000  # パーセンタイル計算に使う直近のサンプル数
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies: deque[float] = deque(maxlen=self.LATENCY_SAMPLES)
+        self.requests = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.input_chars = 0
+        self.output_chars = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def record_success(self, elapsed_seconds: float, text: str, translation: str, usage: Optional[Usage] = None):
+        """成功した呼び出しを記録 (プロバイダがトークン数を報告しなければ概算)"""
+        with self._lock:
+            self.requests += 1
+            self.total_seconds += elapsed_seconds
+            self._latencies.append(elapsed_seconds)
+            self.input_chars += len(text)
+            self.output_chars += len(translation)
+            if usage is not None and usage.reported:
+                self.input_tokens += usage.input_tokens
+                self.output_tokens += usage.output_tokens
+            else:
+                self.input_tokens += TokenEstimator.estimate(text)
+                self.output_tokens += TokenEstimator.estimate(translation)
+
+    def record_failure(self, elapsed_seconds: float):
+        """失敗した呼び出しを記録"""
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.total_seconds += elapsed_seconds
+
+    def snapshot(self) -> dict:
+        """統計のスナップショット"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            succeeded = self.requests - self.errors
+
+            def percentile(ratio: float) -> Optional[float]:
+                if not latencies:
+                    return None
+                return round(latencies[min(len(latencies) - 1, int(len(latencies) * ratio))], 3)
+
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "avg_seconds": round(self.total_seconds / self.requests, 3) if self.requests else None,
+                "p50_seconds": percentile(0.50),
+                "p95_seconds": percentile(0.95),
+                "p99_seconds": percentile(0.99),
+                "input_chars": self.input_chars,
+                "output_chars": self.output_chars,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "avg_input_tokens": round(self.input_tokens / succeeded, 1) if succeeded else None,
+                "avg_output_tokens": round(self.output_tokens / succeeded, 1) if succeeded else None,
+            }
+
+
+class ModelRouter:
+    """テキストに応じてプロバイダ/モデルを選択
+
+    ルーティング表を先頭から評価し、最初に条件を満たした段を使う。
+    どの段にも一致しなければ既定のプロバイダを使う。
+    """
+
+    def __init__(
+        self,
+        default_provider: BaseProvider,
+        tiers: Optional[list[RouteTier]] = None,
+        provider_factory: Optional[Callable[[RouteTier], BaseProvider]] = None,
+    ):
+        self.default_provider = default_provider
+        self.tiers = tiers if tiers else []
+        self.providers: dict[str, BaseProvider] = {DEFAULT_TIER: default_provider}
+        self.stats: dict[str, TierStats] = {DEFAULT_TIER: TierStats()}
+
+        for tier in self.tiers:
+            if tier.name in self.providers:
+                raise ValueError(f"Duplicate route tier name: {tier.name}")
+            self.providers[tier.name] = self._create_tier_provider(tier, provider_factory)
+            self.stats[tier.name] = TierStats()
+
+    def _create_tier_provider(self, tier: RouteTier, provider_factory: Optional[Callable[[RouteTier], BaseProvider]]) -> BaseProvider:
+        """段のプロバイダを作成 (モデルだけが異なる場合は既定のクライアントを共有)"""
+        if (tier.provider is None or tier.provider == self.default_provider.config.provider) and not tier.options:
+            return self.default_provider.with_overrides(model=tier.model or self.default_provider.config.model)
+        if provider_factory is None:
+            raise ValueError(f"Route tier '{tier.name}' uses a different provider but no provider factory is available")
+        return provider_factory(tier)
+
+    def select(self, text: str) -> tuple[str, BaseProvider]:
+        """テキストに対応する段の名前とプロバイダを取得"""
+        if self.tiers:
+            text_class = classify_text(text)
+            for tier in self.tiers:
+                if tier.matches(text, text_class):
+                    return tier.name, self.providers[tier.name]
+        return DEFAULT_TIER, self.default_provider
+
+    def record_success(self, tier_name: str, elapsed_seconds: float, text: str, translation: str, usage: Optional[Usage] = None):
+        """成功した呼び出しを段の統計に記録"""
+        self.stats[tier_name].record_success(elapsed_seconds, text, translation, usage)
+
+    def record_failure(self, tier_name: str, elapsed_seconds: float):
+        """失敗した呼び出しを段の統計に記録"""
+        self.stats[tier_name].record_failure(elapsed_seconds)
+
+    def snapshot(self) -> dict:
+        """全段の設定と統計"""
+        tiers = {}
+        for name, provider in self.providers.items():
+            tiers[name] = {
+                "provider": provider.config.provider,
+                "model": provider.config.model,
+                **self.stats[name].snapshot(),
+            }
+        return tiers
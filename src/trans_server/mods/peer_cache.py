@@ -0,0 +1,115 @@
+"""Translation cache sharing between server instances."""
+
+import hmac
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional
+import httpx
+
+PEER_TOKEN_HEADER = "X-Peer-Token"
+PEER_CACHE_PATH = "/internal/cache"
+
+
+class PeerCache:
+    """他のサーバーインスタンス (ピア) のキャッシュを参照・更新するクライアント
+
+    ローカルのキャッシュにない翻訳を、上流を呼ぶ前に全ピアへ並列に問い合わせる。
+    ピアの障害で翻訳が遅れないよう、問い合わせは短いタイムアウトで打ち切る。
+    """
+
+    def __init__(self, peers: list[str], timeout_seconds: float = 0.3, push: bool = False, token: Optional[str] = None):
+        self.peers = [peer.rstrip("/") for peer in peers]
+        self.timeout_seconds = timeout_seconds
+        self.push_enabled = push
+        self.token = token
+        self._client: Optional[httpx.Client] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._lookups = 0
+        self._hits = 0
+        self._errors = 0
+        self._pushes = 0
+
+    def _get_client(self) -> tuple[httpx.Client, ThreadPoolExecutor]:
+        """HTTPクライアントとワーカーを取得 (プリフォーク後に作るため遅延生成)"""
+        with self._lock:
+            if self._client is None or self._executor is None:
+                headers = {PEER_TOKEN_HEADER: self.token} if self.token else {}
+                self._client = httpx.Client(timeout=self.timeout_seconds, headers=headers)
+                self._executor = ThreadPoolExecutor(max_workers=max(4, len(self.peers) * 2), thread_name_prefix="peer")
+            return self._client, self._executor
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _fetch(self, client: httpx.Client, peer: str, params: dict) -> Optional[str]:
+        """1つのピアに問い合わせる (なければNone)"""
+        try:
+            response = client.get(f"{peer}{PEER_CACHE_PATH}", params=params)
+        except httpx.HTTPError:
+            self._count("_errors")
+            return None
+        if response.status_code == 200:
+            return response.text
+        if response.status_code != 404:
+            self._count("_errors")
+        return None
+
+    def lookup(self, src_lang: str, dst_lang: str, text: str, namespace: str = "", version: str = "") -> Optional[str]:
+        """全ピアに並列で問い合わせ、最初に見つかった翻訳を返す (版が異なるピアの翻訳は使わない)"""
+        if not self.peers:
+            return None
+        client, executor = self._get_client()
+        self._count("_lookups")
+
+        params = {"from": src_lang, "to": dst_lang, "text": text, "ns": namespace, "v": version}
+        pending: set[Future] = {executor.submit(self._fetch, client, peer, params) for peer in self.peers}
+        while pending:
+            done, pending = wait(pending, timeout=self.timeout_seconds, return_when=FIRST_COMPLETED)
+            if not done:
+                # 応答の遅いピアは待たない
+                break
+            for future in done:
+                translation = future.result()
+                if translation is not None:
+                    self._count("_hits")
+                    return translation
+        return None
+
+    def _send(self, client: httpx.Client, peer: str, payload: dict):
+        """1つのピアに翻訳を送る"""
+        try:
+            client.post(f"{peer}{PEER_CACHE_PATH}", json=payload).raise_for_status()
+        except httpx.HTTPError as e:
+            self._count("_errors")
+            print(f"Peer push to {peer} failed: {e}", file=sys.stderr)
+
+    def push(self, src_lang: str, dst_lang: str, text: str, translation: str, namespace: str = "", version: str = ""):
+        """新しい翻訳を全ピアへ送る (応答は待たない)"""
+        if not self.peers or not self.push_enabled:
+            return
+        client, executor = self._get_client()
+        self._count("_pushes")
+        payload = {"from": src_lang, "to": dst_lang, "text": text, "translation": translation, "ns": namespace, "v": version}
+        for peer in self.peers:
+            executor.submit(self._send, client, peer, payload)
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """内部エンドポイントへのリクエストを許可するか (トークン未設定なら参照のみ登録されるので常に許可)"""
+        if not self.token:
+            return True
+        return hmac.compare_digest((token or "").encode("utf-8"), self.token.encode("utf-8"))
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._lock:
+            return {
+                "peers": self.peers,
+                "push": self.push_enabled,
+                "lookups": self._lookups,
+                "hits": self._hits,
+                "errors": self._errors,
+                "pushes": self._pushes,
+            }
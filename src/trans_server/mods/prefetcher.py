@@ -0,0 +1,214 @@
+"""Predictive prefetch of the strings likely to be requested next."""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Hashable
+
+# (名前空間, 翻訳元言語, 翻訳先言語, 原文)
+TextKey = tuple[str, str, str, str]
+
+
+class SuccessorModel:
+    """直前に要求されたテキストから、次に要求されるテキストを予測する共起モデル
+
+    同じクライアントの直近 window 件のテキストそれぞれから新しいテキストへの遷移を数える。
+    メニューのようにほぼ同時に要求される一群は、順序が入れ替わっても共起として学習される。
+    記録するテキスト数と1テキストあたりの後続候補数には上限があり、超えたら古いもの・少ないものから捨てる。
+    """
+
+    MAX_STREAMS = 1024  # 履歴を保持するクライアント数
+
+    def __init__(self, window: int = 3, gap_seconds: float = 30.0, max_sources: int = 50000, max_successors: int = 8):
+        self.window = window
+        self.gap_seconds = gap_seconds
+        self.max_sources = max_sources
+        self.max_successors = max_successors
+        self._successors: OrderedDict[TextKey, dict[str, int]] = OrderedDict()
+        self._streams: OrderedDict[Hashable, deque[tuple[str, float]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._transitions = 0
+
+    def record(self, stream: Hashable, namespace: str, src_lang: str, dst_lang: str, text: str):
+        """クライアント (stream) が要求したテキストを記録"""
+        now = time.monotonic()
+        with self._lock:
+            history = self._streams.get(stream)
+            if history is None:
+                history = self._streams[stream] = deque(maxlen=self.window)
+                while len(self._streams) > self.MAX_STREAMS:
+                    self._streams.popitem(last=False)
+            self._streams.move_to_end(stream)
+
+            # 間が空いたら別の場面とみなす
+            if history and now - history[-1][1] > self.gap_seconds:
+                history.clear()
+            if history and history[-1][0] == text:
+                return
+
+            for previous, _ in history:
+                if previous != text:
+                    self._count((namespace, src_lang, dst_lang, previous), text)
+            history.append((text, now))
+
+    def _count(self, key: TextKey, successor: str):
+        """遷移を1回数える (ロック内で呼ぶ)"""
+        counts = self._successors.get(key)
+        if counts is None:
+            counts = self._successors[key] = {}
+            while len(self._successors) > self.max_sources:
+                self._successors.popitem(last=False)
+        self._successors.move_to_end(key)
+        counts[successor] = counts.get(successor, 0) + 1
+        self._transitions += 1
+        if len(counts) > self.max_successors:
+            # 今回の後続は残し、それ以外で最も少ないものを捨てる
+            weakest = min((name for name in counts if name != successor), key=counts.__getitem__)
+            del counts[weakest]
+
+    def predict(self, namespace: str, src_lang: str, dst_lang: str, text: str, limit: int, min_confidence: float, min_count: int = 2) -> list[str]:
+        """次に要求されそうなテキストを確からしい順に取得"""
+        with self._lock:
+            counts = self._successors.get((namespace, src_lang, dst_lang, text))
+            if not counts:
+                return []
+            total = sum(counts.values())
+            ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        return [successor for successor, count in ranked if count >= min_count and count / total >= min_confidence][:limit]
+
+    def save(self, path: str):
+        """学習した遷移をJSONファイルに保存 (書き込み途中のファイルを読ませないよう置き換える)"""
+        with self._lock:
+            successors = [[*key, counts] for key, counts in self._successors.items()]
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"successors": successors}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def load(self, path: str) -> int:
+        """保存した遷移を読み込み、読み込んだテキスト数を返す"""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            for namespace, src_lang, dst_lang, text, counts in data.get("successors", []):
+                self._successors[(namespace, src_lang, dst_lang, text)] = {str(name): int(count) for name, count in counts.items()}
+            while len(self._successors) > self.max_sources:
+                self._successors.popitem(last=False)
+            return len(self._successors)
+
+    @property
+    def transitions(self) -> int:
+        """これまでに数えた遷移の数 (保存が必要かの判定用)"""
+        with self._lock:
+            return self._transitions
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._lock:
+            return {
+                "sources": len(self._successors),
+                "streams": len(self._streams),
+                "transitions": self._transitions,
+            }
+
+
+class Prefetcher:
+    """予測したテキストの先読み翻訳の待ち行列と効果の集計
+
+    待ち行列は新しい予測を先に処理し (プレイヤーが今いる場面を優先)、あふれたら古い予測から捨てる。
+    先読みした翻訳に実際のリクエストが来た回数を used として数える。
+    """
+
+    RECENT_PREFETCHES = 10000  # 効果の集計のために覚えておく先読み済みテキスト数
+
+    def __init__(self, model: SuccessorModel, fanout: int = 4, min_confidence: float = 0.2, queue_size: int = 256, max_age_seconds: float = 10.0):
+        self.model = model
+        self.fanout = fanout
+        self.min_confidence = min_confidence
+        self.queue_size = queue_size
+        self.max_age_seconds = max_age_seconds
+        self._queue: deque[tuple[float, TextKey, Any]] = deque()
+        self._queued: set[TextKey] = set()
+        self._prefetched: OrderedDict[TextKey, None] = OrderedDict()
+        self._condition = threading.Condition()
+        self._predicted = 0
+        self._dropped = 0
+        self._skipped = 0
+        self._translated = 0
+        self._failed = 0
+        self._used = 0
+
+    def observe(self, stream: Hashable, namespace: str, src_lang: str, dst_lang: str, text: str) -> list[str]:
+        """リクエストを記録し、次に要求されそうなテキストを返す"""
+        self.model.record(stream, namespace, src_lang, dst_lang, text)
+        return self.model.predict(namespace, src_lang, dst_lang, text, self.fanout, self.min_confidence)
+
+    def offer(self, key: TextKey, job: Any):
+        """先読みの候補を待ち行列に入れる (同じテキストが待機中なら何もしない)"""
+        with self._condition:
+            if key in self._queued:
+                return
+            self._predicted += 1
+            self._queue.append((time.monotonic(), key, job))
+            self._queued.add(key)
+            while len(self._queue) > self.queue_size:
+                _, dropped, _ = self._queue.popleft()
+                self._queued.discard(dropped)
+                self._dropped += 1
+            self._condition.notify()
+
+    def take(self) -> tuple[TextKey, Any]:
+        """次の候補を取り出す (古くなった候補は捨てる)"""
+        with self._condition:
+            while True:
+                while not self._queue:
+                    self._condition.wait()
+                queued_at, key, job = self._queue.pop()
+                self._queued.discard(key)
+                if time.monotonic() - queued_at <= self.max_age_seconds:
+                    return key, job
+                self._dropped += 1
+
+    def record_dropped(self):
+        """実リクエストの呼び出し枠を残すため先読みを見送った"""
+        with self._condition:
+            self._dropped += 1
+
+    def record_skipped(self):
+        """翻訳済みだったため先読みしなかった"""
+        with self._condition:
+            self._skipped += 1
+
+    def record_result(self, key: TextKey, success: bool):
+        """先読みの結果を記録"""
+        with self._condition:
+            if not success:
+                self._failed += 1
+                return
+            self._translated += 1
+            self._prefetched[key] = None
+            while len(self._prefetched) > self.RECENT_PREFETCHES:
+                self._prefetched.popitem(last=False)
+
+    def claim(self, key: TextKey):
+        """キャッシュヒットしたテキストが先読みしたものなら数える"""
+        with self._condition:
+            if key in self._prefetched:
+                del self._prefetched[key]
+                self._used += 1
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._condition:
+            return {
+                "queued": len(self._queue),
+                "predicted": self._predicted,
+                "dropped": self._dropped,
+                "skipped_cached": self._skipped,
+                "translated": self._translated,
+                "failed": self._failed,
+                "used": self._used,
+                "model": self.model.snapshot(),
+            }
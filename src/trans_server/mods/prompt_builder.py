@@ -1,16 +1,47 @@
 """Prompt builder for AI translation."""
 
+import hashlib
 import re
 from typing import Optional
 from ..utils.language_mapper import LanguageMapper
+from ..utils.tracing import traced
 
 
 class PromptBuilder:
-    """AI翻訳用のプロンプト構築"""
+    """AI翻訳用のプロンプト構築
+
+    プロファイル:
+    - full: 規則をシステムプロンプトと各リクエストの両方に含める (従来の形式)
+    - compact: 規則はシステムプロンプトにだけ含め、リクエストには言語ペアとテキストだけを送る
+    """
+
+    # 翻訳タグの終端。停止シーケンスとして渡すと応答に含まれないため、抽出前に補う
+    STOP_SEQUENCE = "</translate>"
+    PROFILES = ("full", "compact")
+
+    def __init__(self, profile: str = "full"):
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unsupported prompt profile: {profile} (choose from {', '.join(self.PROFILES)})")
+        self.profile = profile
 
     @staticmethod
-    def build_system_prompt(app_summary: Optional[str] = None) -> str:
+    def _build_app_context(app_summary: Optional[str]) -> str:
+        """アプリケーション概要のブロック"""
+        if not app_summary:
+            return ""
+        return (
+            "\n\n<app_context>\n"
+            "Background information about the application (NOT for translation - use this to understand the domain and terminology):\n"
+            f"{app_summary}\n"
+            "</app_context>"
+        )
+
+    @traced("prompt")
+    def build_system_prompt(self, app_summary: Optional[str] = None) -> str:
         """システムプロンプトを構築"""
+        if self.profile == "compact":
+            return self._build_compact_system_prompt(app_summary)
+
         base_prompt = """You are a professional translator for games and applications.
 
 CRITICAL RULES:
@@ -22,17 +53,33 @@ CRITICAL RULES:
 - Maintain original line breaks and formatting
 - Keep terms already established in the target language region (e.g., in Japan: ATK, HP, MP, ID)"""
 
-        if app_summary:
-            base_prompt += f"\n\n<app_context>\nBackground information about the application (NOT for translation - use this to understand the domain and terminology):\n{app_summary}\n</app_context>"
+        return base_prompt + self._build_app_context(app_summary)
 
-        return base_prompt
+    def _build_compact_system_prompt(self, app_summary: Optional[str]) -> str:
+        """compact プロファイルのシステムプロンプト (リクエスト側の規則と出力形式もここにまとめる)"""
+        base_prompt = """You are a professional translator for games and applications.
+Each request is "<source language> -> <target language>" followed by <request_text>...</request_text>.
 
-    @staticmethod
-    def build_translation_request(text: str, src_lang: str, dst_lang: str) -> str:
+CRITICAL RULES:
+- Output ONLY <translate>your translation here</translate>
+- NO explanations or extra text
+- Preserve ALL whitespace exactly (leading/trailing spaces, newlines, indentation)
+- Preserve ALL tags and markup structure (translate only the content within tags)
+- For short text, aim for balanced character width using concise wording (multibyte chars = width 2, single-byte chars = width 1)
+- Keep terms already established in the target language region (e.g., in Japan: ATK, HP, MP, ID)"""
+
+        return base_prompt + self._build_app_context(app_summary)
+
+    @traced("prompt")
+    def build_translation_request(self, text: str, src_lang: str, dst_lang: str) -> str:
         """翻訳リクエストプロンプトを構築（フラットな疑似XML形式）"""
         src_lang_name = LanguageMapper.get_language_name(src_lang)
         dst_lang_name = LanguageMapper.get_language_name(dst_lang)
 
+        if self.profile == "compact":
+            # 規則はシステムプロンプトにあるため、言語ペアとテキストだけを送る
+            return f"{src_lang_name} -> {dst_lang_name}\n<request_text>{text}</request_text>"
+
         prompt = f"""Translate from {src_lang_name} to {dst_lang_name}:
 
 <request_text>{text}</request_text>
@@ -50,7 +97,22 @@ Rules:
 
         return prompt
 
+    def fingerprint(self, app_summary: Optional[str] = None) -> str:
+        """プロンプトの版 (規則・形式・概要のいずれかが変わると変わる、キャッシュの版に使う)"""
+        system_prompt = self.build_system_prompt(app_summary)
+        request_prompt = self.build_translation_request("{text}", "ja", "en")
+        return hashlib.blake2b(f"{system_prompt}\0{request_prompt}".encode("utf-8"), digest_size=8).hexdigest()
+
+    @classmethod
+    def restore_stop_sequence(cls, response: str) -> str:
+        """停止シーケンスで切り取られた応答に終端タグを補う"""
+        start = response.find("<translate>")
+        if start != -1 and cls.STOP_SEQUENCE not in response[start:]:
+            return response + cls.STOP_SEQUENCE
+        return response
+
     @staticmethod
+    @traced("parse")
     def extract_translation(response: str) -> str:
         """AI応答から翻訳結果を抽出"""
         # <translate>...</translate>のパターンで抽出（改行や空白も含む）
@@ -0,0 +1,66 @@
+"""Token bucket rate limiting for upstream calls."""
+
+import math
+import threading
+import time
+from typing import Optional
+
+
+class RateLimitExceededError(Exception):
+    """プロファイルの呼び出し上限を超えたため拒否した"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """トークンバケットによる呼び出し数の制限
+
+    rate_per_second の速度でトークンが補充され、最大 burst 個まで貯まる。
+    """
+
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        self.rate_per_second = rate_per_second
+        self.burst = burst if burst else max(1, math.ceil(rate_per_second))
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._total_rejections = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+    def acquire(self, name: str):
+        """トークンを1つ消費
+
+        Raises:
+            RateLimitExceededError: トークンが残っていない
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return
+            self._total_rejections += 1
+            retry_after = (1.0 - self._tokens) / self.rate_per_second
+        raise RateLimitExceededError(f"Profile '{name}' exceeded {self.rate_per_second}/sec", retry_after)
+
+    @property
+    def tokens(self) -> float:
+        """残りのトークン数 (消費はしない)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_second": self.rate_per_second,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 2),
+                "total_rejections": self._total_rejections,
+            }
@@ -0,0 +1,110 @@
+"""Runtime state of a tenant (per-game) profile."""
+
+import hashlib
+import math
+from typing import Callable, Optional
+from ..data_models import RouteTier
+from ..data_models.tenant_profile import TenantProfile, namespace_of
+from ..providers.base_provider import BaseProvider
+from .model_router import ModelRouter
+from .prompt_builder import PromptBuilder
+from .rate_limiter import TokenBucket
+from .translation_pack import TranslationPack
+
+
+def cache_version(router: ModelRouter) -> str:
+    """キャッシュの版 (ルーティング先のプロバイダ・モデル・プロンプト・概要のいずれかが変わると変わる)"""
+    parts = sorted(
+        {
+            f"{provider.config.provider}:{provider.config.model}:{PromptBuilder(provider.config.prompt_profile).fingerprint(provider.config.summary)}"
+            for provider in router.providers.values()
+        }
+    )
+    return hashlib.blake2b("\n".join(parts).encode("utf-8"), digest_size=6).hexdigest()
+
+
+class Tenant:
+    """1つのプロファイルのプロバイダ・ルーティング・キャッシュ名前空間・呼び出し上限"""
+
+    def __init__(
+        self,
+        name: str,
+        router: ModelRouter,
+        weight: float = 1.0,
+        rate_limiter: Optional[TokenBucket] = None,
+        pack: Optional[TranslationPack] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self.name = name
+        self.router = router
+        self.weight = weight
+        self.rate_limiter = rate_limiter
+        self.pack = pack
+        self.ttl_seconds = ttl_seconds
+        # 既定のプロファイルは従来のキャッシュをそのまま使う
+        self.namespace = namespace_of(name)
+        # 版が変わると、それまでのキャッシュは返さず再翻訳の候補になる
+        self.version = cache_version(router)
+
+    @property
+    def provider(self) -> BaseProvider:
+        """このプロファイルの既定のプロバイダ (フォールバック言語などの設定元)"""
+        return self.router.default_provider
+
+    def acquire_rate(self):
+        """上流呼び出し1回分の枠を消費 (上限がなければ何もしない)
+
+        Raises:
+            RateLimitExceededError: 呼び出し上限を超えた
+        """
+        if self.rate_limiter:
+            self.rate_limiter.acquire(self.name)
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        return {
+            "provider": self.provider.config.provider,
+            "model": self.provider.config.model,
+            "weight": self.weight,
+            "cache_version": self.version,
+            "rate": self.rate_limiter.snapshot() if self.rate_limiter else None,
+            "pack": self.pack.snapshot() if self.pack else None,
+        }
+
+    @staticmethod
+    def from_profile(
+        profile: TenantProfile,
+        default_provider: BaseProvider,
+        provider_factory: Optional[Callable[[TenantProfile], BaseProvider]] = None,
+        route_factory: Optional[Callable[[RouteTier], BaseProvider]] = None,
+        workers: int = 1,
+    ) -> "Tenant":
+        """プロファイルから作成 (プロバイダが同じなら既定のクライアントと接続を共有)
+
+        呼び出し上限はワーカープロセスごとに持つため、workers で等分してサーバー全体の上限をプロファイルの設定に合わせる。
+        """
+        if (profile.provider is None or profile.provider == default_provider.config.provider) and not profile.options:
+            config = default_provider.config
+            provider = default_provider.with_overrides(
+                model=profile.model or config.model,
+                summary=profile.summary if profile.summary is not None else config.summary,
+                fallback_src_lang=profile.fallback_src_lang or config.fallback_src_lang,
+                fallback_dst_lang=profile.fallback_dst_lang or config.fallback_dst_lang,
+            )
+        elif provider_factory is None:
+            raise ValueError(f"Profile '{profile.name}' uses a different provider but no provider factory is available")
+        else:
+            provider = provider_factory(profile)
+
+        return Tenant(
+            profile.name,
+            ModelRouter(provider, profile.routes, route_factory),
+            weight=profile.weight,
+            rate_limiter=(
+                TokenBucket(profile.rate_per_second / workers, math.ceil(profile.burst / workers) if profile.burst else None)
+                if profile.rate_per_second > 0
+                else None
+            ),
+            pack=TranslationPack(profile.pack_path) if profile.pack_path else None,
+            ttl_seconds=profile.ttl_seconds,
+        )
@@ -48,3 +48,24 @@ def should_skip_translation(text: str) -> bool:
         return True
 
     return False
+
+
+def classify_text(text: str) -> str:
+    """テキストを種類で分類 (モデルのルーティング用)
+
+    Args:
+        text: 分類対象のテキスト
+
+    Returns:
+        "paragraph": 複数行または長文, "dialogue": 台詞・文章, "label": ボタンやメニューなどの短いラベル
+    """
+    # 3行以上、または200文字以上は段落
+    if text.count("\n") >= 2 or len(text) >= 200:
+        return "paragraph"
+
+    # 括弧・引用符、または文末の句読点を含むものは台詞
+    stripped = text.strip()
+    if re.search(r"[「」『』“”\"]", stripped) or re.search(r"[。！？!?…]$|\.$", stripped):
+        return "dialogue"
+
+    return "label"
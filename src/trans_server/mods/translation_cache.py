@@ -0,0 +1,533 @@
+"""Translation caches (in-memory and shared SQLite)."""
+
+import fnmatch
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+# (名前空間, 翻訳元言語, 翻訳先言語, 原文)
+CacheKey = tuple[str, str, str, str]
+
+
+def expiry(ttl_seconds: float) -> Optional[float]:
+    """有効期限の時刻 (0以下なら無期限)"""
+    return time.time() + ttl_seconds if ttl_seconds > 0 else None
+
+
+class CacheEntry:
+    """キャッシュ済みの翻訳1件 (無効化した翻訳は版を None にして、再翻訳の候補として残す)"""
+
+    __slots__ = ("translation", "version", "hits", "updated_at", "expires_at")
+
+    def __init__(self, translation: str, version: Optional[str], expires_at: Optional[float], hits: int = 0):
+        self.translation = translation
+        self.version = version
+        self.hits = hits
+        self.updated_at = time.time()
+        self.expires_at = expires_at
+
+    def expired(self, now: float) -> bool:
+        """有効期限を過ぎているか"""
+        return self.expires_at is not None and self.expires_at <= now
+
+    def as_dict(self, key: CacheKey) -> dict:
+        """管理APIで返す形式に変換"""
+        namespace, src_lang, dst_lang, text = key
+        return {
+            "namespace": namespace,
+            "from": src_lang,
+            "to": dst_lang,
+            "text": text,
+            "translation": self.translation,
+            "version": self.version,
+            "hits": self.hits,
+            "updated_at": self.updated_at,
+            "expires_at": self.expires_at,
+        }
+
+
+class TranslationCache:
+    """翻訳結果のLRUキャッシュ (スレッドセーフ)
+
+    各翻訳はプロンプトとモデルから決まる版を持ち、取得時の版と一致し期限内のものだけを返す。
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def _lookup(self, key: CacheKey, version: str) -> Optional[CacheEntry]:
+        """有効な翻訳を取得 (期限切れなら削除する、ロック内で呼ぶ)"""
+        entry = self._entries.get(key)
+        if entry is None or entry.version != version:
+            return None
+        if entry.expired(time.time()):
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, src_lang: str, dst_lang: str, text: str, namespace: str = "", version: str = "") -> Optional[str]:
+        """キャッシュ済みの翻訳を取得 (なければNone)"""
+        key = (namespace, src_lang, dst_lang, text)
+        with self._lock:
+            entry = self._lookup(key, version)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self._hits += 1
+            return entry.translation
+
+    def peek(self, src_lang: str, dst_lang: str, text: str, namespace: str = "", version: str = "") -> Optional[str]:
+        """統計やLRU順序を更新せずに翻訳を取得"""
+        with self._lock:
+            entry = self._lookup((namespace, src_lang, dst_lang, text), version)
+            return entry.translation if entry else None
+
+    def set(self, src_lang: str, dst_lang: str, text: str, translation: str, namespace: str = "", version: str = "", ttl_seconds: float = 0.0):
+        """翻訳をキャッシュに保存 (上限を超えたら古いものから破棄、ヒット数は引き継ぐ)"""
+        if self.max_entries <= 0:
+            return
+        key = (namespace, src_lang, dst_lang, text)
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = CacheEntry(translation, version, expiry(ttl_seconds), previous.hits if previous else 0)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def acquire_lease(self, src_lang: str, dst_lang: str, text: str, namespace: str = "") -> bool:  # pylint: disable=unused-argument
+        """上流呼び出しの担当権を取得 (単一プロセスでは常に取得できる)"""
+        return True
+
+    def release_lease(self, src_lang: str, dst_lang: str, text: str, namespace: str = ""):
+        """上流呼び出しの担当権を返却"""
+
+    def renew_leases(self):
+        """保持中のリースの有効期限を延長 (単一プロセスではリースを使わない)"""
+
+    def has_lease(self, src_lang: str, dst_lang: str, text: str, namespace: str = "") -> bool:  # pylint: disable=unused-argument
+        """いずれかのワーカーが有効なリースを持っているか"""
+        return False
+
+    @staticmethod
+    def _matches(
+        key: CacheKey,
+        entry: CacheEntry,
+        namespace: Optional[str],
+        src_lang: Optional[str],
+        dst_lang: Optional[str],
+        pattern: Optional[str],
+    ) -> bool:
+        """検索条件に一致するか (pattern は原文または訳文に対するglob)"""
+        if namespace is not None and key[0] != namespace:
+            return False
+        if (src_lang and key[1] != src_lang) or (dst_lang and key[2] != dst_lang):
+            return False
+        return not pattern or fnmatch.fnmatchcase(key[3], pattern) or fnmatch.fnmatchcase(entry.translation, pattern)
+
+    def search(
+        self,
+        pattern: Optional[str] = None,
+        namespace: Optional[str] = None,
+        src_lang: Optional[str] = None,
+        dst_lang: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """条件に一致する翻訳をヒット数の多い順に取得"""
+        with self._lock:
+            found = [entry.as_dict(key) for key, entry in self._entries.items() if self._matches(key, entry, namespace, src_lang, dst_lang, pattern)]
+        found.sort(key=lambda item: item["hits"], reverse=True)
+        return found[:limit]
+
+    def invalidate(
+        self,
+        namespace: Optional[str] = None,
+        src_lang: Optional[str] = None,
+        dst_lang: Optional[str] = None,
+        pattern: Optional[str] = None,
+    ) -> int:
+        """条件に一致する翻訳を無効化し、無効化した件数を返す"""
+        count = 0
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.version is not None and self._matches(key, entry, namespace, src_lang, dst_lang, pattern):
+                    entry.version = None
+                    count += 1
+        return count
+
+    def adopt_version(self, namespace: str, version: str) -> int:  # pylint: disable=unused-argument
+        """版のない古い翻訳に現在の版を付ける (メモリ上のキャッシュには古い翻訳はない)"""
+        return 0
+
+    def stale_entries(self, namespace: str, version: str, limit: int = 20) -> list[tuple[str, str, str]]:
+        """版が古い・無効化済みの翻訳 (再翻訳の候補) をヒット数の多い順に取得
+
+        期限切れの翻訳は候補にしない (要求されたときに翻訳し直す)。
+        """
+        now = time.time()
+        with self._lock:
+            stale = [(entry.hits, key) for key, entry in self._entries.items() if key[0] == namespace and entry.version != version and not entry.expired(now)]
+        stale.sort(key=lambda item: item[0], reverse=True)
+        return [key[1:] for _, key in stale[:limit]]
+
+    def summary(self) -> list[dict]:
+        """名前空間・言語ペア・版ごとの件数とヒット数"""
+        now = time.time()
+        groups: dict[tuple[str, str, str, Optional[str]], dict] = {}
+        with self._lock:
+            for key, entry in self._entries.items():
+                group = groups.get((*key[:3], entry.version))
+                if group is None:
+                    group = groups[(*key[:3], entry.version)] = {
+                        "namespace": key[0],
+                        "from": key[1],
+                        "to": key[2],
+                        "version": entry.version,
+                        "entries": 0,
+                        "hits": 0,
+                        "expired": 0,
+                    }
+                group["entries"] += 1
+                group["hits"] += entry.hits
+                group["expired"] += int(entry.expired(now))
+        return list(groups.values())
+
+    def compact(self, current_versions: Optional[dict[str, str]] = None, vacuum: bool = False) -> int:  # pylint: disable=unused-argument
+        """期限切れ・無効化済みの翻訳 (current_versions を指定すればその版以外も) を削除し、削除した件数を返す"""
+        now = time.time()
+        with self._lock:
+            removed = [
+                key
+                for key, entry in self._entries.items()
+                if entry.version is None
+                or entry.expired(now)
+                or (current_versions is not None and key[0] in current_versions and entry.version != current_versions[key[0]])
+            ]
+            for key in removed:
+                del self._entries[key]
+        return len(removed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+class SqliteTranslationCache:
+    """SQLite (WALモード) による複数プロセス共有の翻訳キャッシュ
+
+    プリフォークした全ワーカーが同じファイルを開き、キャッシュと上流呼び出しの担当権 (リース) を共有する。
+    リースにより、あるワーカーで翻訳中のテキストを他のワーカーが重複して上流へ送らないようにする。
+    ヒット数は書き込みを減らすためにまとめて反映する (終了時に未反映の分は失われる)。
+    """
+
+    EVICTION_INTERVAL = 100  # この件数を保存するごとに上限超過分を削除
+    HIT_FLUSH_INTERVAL = 100  # この回数ヒットするごとにヒット数を書き込む
+    TRANSLATIONS_SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS translations ("
+        "namespace TEXT NOT NULL, src_lang TEXT NOT NULL, dst_lang TEXT NOT NULL, text TEXT NOT NULL, translation TEXT NOT NULL, "
+        "version TEXT, hits INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL, expires_at REAL, "
+        "PRIMARY KEY (namespace, src_lang, dst_lang, text)) WITHOUT ROWID"
+    )
+    ENTRY_FIELDS = ("namespace", "from", "to", "text", "translation", "version", "hits", "updated_at", "expires_at")
+
+    def __init__(self, path: str, max_entries: int = 10000, lease_seconds: float = 60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.lease_seconds = lease_seconds
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._sets = 0
+        self._pending_hits: dict[CacheKey, int] = {}
+        # このプロセスが保持中のリースと所有者 (上流呼び出しが長引いても期限切れにならないよう延長する)
+        self._held_leases: dict[CacheKey, str] = {}
+
+        conn = self._connect()
+        with conn:
+            self._migrate(conn)
+            conn.execute(self.TRANSLATIONS_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_updated_at ON translations (updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS translations_hits ON translations (namespace, hits)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "namespace TEXT NOT NULL, src_lang TEXT NOT NULL, dst_lang TEXT NOT NULL, text TEXT NOT NULL, owner TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (namespace, src_lang, dst_lang, text)) WITHOUT ROWID"
+            )
+
+    @classmethod
+    def _migrate(cls, conn: sqlite3.Connection):
+        """古い形式のファイルを移行 (名前空間のない翻訳は既定の名前空間に入れ、版は起動時に現在の版を付ける)"""
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(translations)")]
+        if not columns or "version" in columns:
+            return
+        namespace = "namespace" if "namespace" in columns else "''"
+        conn.execute("ALTER TABLE translations RENAME TO translations_old")
+        conn.execute("DROP INDEX IF EXISTS translations_updated_at")
+        conn.execute(cls.TRANSLATIONS_SCHEMA)
+        conn.execute(
+            "INSERT INTO translations (namespace, src_lang, dst_lang, text, translation, version, hits, updated_at, expires_at) "
+            f"SELECT {namespace}, src_lang, dst_lang, text, translation, '', 0, updated_at, NULL FROM translations_old"
+        )
+        conn.execute("DROP TABLE translations_old")
+        conn.execute("DROP TABLE IF EXISTS leases")
+
+    def _connect(self) -> sqlite3.Connection:
+        """スレッド・プロセスごとの接続を取得 (fork後は新しい接続を開く)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        # リースの所有者はプロセスとスレッドごとに一意にする
+        self._local.owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        return conn
+
+    def peek(self, src_lang: str, dst_lang: str, text: str, namespace: str = "", version: str = "") -> Optional[str]:
+        """統計を更新せずに翻訳を取得"""
+        cursor = self._connect().execute(
+            "SELECT translation FROM translations WHERE namespace = ? AND src_lang = ? AND dst_lang = ? AND text = ? AND version = ? "
+            "AND (expires_at IS NULL OR expires_at > ?)",
+            (namespace, src_lang, dst_lang, text, version, time.time()),
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def get(self, src_lang: str, dst_lang: str, text: str, namespace: str = "", version: str = "") -> Optional[str]:
+        """キャッシュ済みの翻訳を取得 (なければNone)"""
+        translation = self.peek(src_lang, dst_lang, text, namespace, version)
+        flush: Optional[dict[CacheKey, int]] = None
+        with self._counter_lock:
+            if translation is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+                key = (namespace, src_lang, dst_lang, text)
+                self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+                if self._hits % self.HIT_FLUSH_INTERVAL == 0:
+                    flush, self._pending_hits = self._pending_hits, {}
+        if flush:
+            self._write_hits(flush)
+        return translation
+
+    def _write_hits(self, hits: dict[CacheKey, int]):
+        """ヒット数をまとめて書き込む"""
+        self._connect().executemany(
+            "UPDATE translations SET hits = hits + ? WHERE namespace = ? AND src_lang = ? AND dst_lang = ? AND text = ?",
+            [(count, *key) for key, count in hits.items()],
+        )
+
+    def flush_hits(self):
+        """未反映のヒット数を書き込む (管理操作の前に呼ぶ)"""
+        with self._counter_lock:
+            hits, self._pending_hits = self._pending_hits, {}
+        if hits:
+            self._write_hits(hits)
+
+    def set(self, src_lang: str, dst_lang: str, text: str, translation: str, namespace: str = "", version: str = "", ttl_seconds: float = 0.0):
+        """翻訳をキャッシュに保存 (上限を超えたら古いものから破棄、ヒット数は引き継ぐ)"""
+        if self.max_entries <= 0:
+            return
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO translations (namespace, src_lang, dst_lang, text, translation, version, updated_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (namespace, src_lang, dst_lang, text) DO UPDATE SET "
+            "translation = excluded.translation, version = excluded.version, updated_at = excluded.updated_at, expires_at = excluded.expires_at",
+            (namespace, src_lang, dst_lang, text, translation, version, time.time(), expiry(ttl_seconds)),
+        )
+
+        with self._counter_lock:
+            self._sets += 1
+            evict = self._sets % self.EVICTION_INTERVAL == 0
+        if evict:
+            conn.execute(
+                "DELETE FROM translations WHERE updated_at <= (SELECT updated_at FROM translations ORDER BY updated_at DESC LIMIT 1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def acquire_lease(self, src_lang: str, dst_lang: str, text: str, namespace: str = "") -> bool:
+        """上流呼び出しの担当権を取得 (他のワーカーが有効なリースを持っていればFalse)"""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM leases WHERE namespace = ? AND src_lang = ? AND dst_lang = ? AND text = ? AND expires_at < ?",
+                (namespace, src_lang, dst_lang, text, now),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO leases (namespace, src_lang, dst_lang, text, owner, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, src_lang, dst_lang, text, self._local.owner, now + self.lease_seconds),
+            )
+            acquired = cursor.rowcount == 1
+        if acquired:
+            with self._counter_lock:
+                self._held_leases[(namespace, src_lang, dst_lang, text)] = self._local.owner
+        return acquired
+
+    def release_lease(self, src_lang: str, dst_lang: str, text: str, namespace: str = ""):
+        """上流呼び出しの担当権を返却"""
+        conn = self._connect()
+        conn.execute(
+            "DELETE FROM leases WHERE namespace = ? AND src_lang = ? AND dst_lang = ? AND text = ? AND owner = ?",
+            (namespace, src_lang, dst_lang, text, self._local.owner),
+        )
+        with self._counter_lock:
+            if self._held_leases.get((namespace, src_lang, dst_lang, text)) == self._local.owner:
+                del self._held_leases[(namespace, src_lang, dst_lang, text)]
+
+    def renew_leases(self):
+        """保持中のリースの有効期限を延長 (lease_seconds より短い間隔で呼ぶ)"""
+        with self._counter_lock:
+            held = list(self._held_leases.items())
+        if not held:
+            return
+        conn = self._connect()
+        expires_at = time.time() + self.lease_seconds
+        with conn:
+            conn.executemany(
+                "UPDATE leases SET expires_at = ? WHERE namespace = ? AND src_lang = ? AND dst_lang = ? AND text = ? AND owner = ?",
+                [(expires_at, *key, owner) for key, owner in held],
+            )
+
+    def has_lease(self, src_lang: str, dst_lang: str, text: str, namespace: str = "") -> bool:
+        """いずれかのワーカーが有効なリースを持っているか"""
+        cursor = self._connect().execute(
+            "SELECT 1 FROM leases WHERE namespace = ? AND src_lang = ? AND dst_lang = ? AND text = ? AND expires_at >= ?",
+            (namespace, src_lang, dst_lang, text, time.time()),
+        )
+        row = cursor.fetchone()
+        return row is not None
+
+    @staticmethod
+    def _where(namespace: Optional[str], src_lang: Optional[str], dst_lang: Optional[str], pattern: Optional[str]) -> tuple[str, list]:
+        """検索条件のWHERE句 (pattern は原文または訳文に対するglob)"""
+        clauses, params = ["1 = 1"], []
+        if namespace is not None:
+            clauses.append("namespace = ?")
+            params.append(namespace)
+        if src_lang:
+            clauses.append("src_lang = ?")
+            params.append(src_lang)
+        if dst_lang:
+            clauses.append("dst_lang = ?")
+            params.append(dst_lang)
+        if pattern:
+            clauses.append("(text GLOB ? OR translation GLOB ?)")
+            params.extend([pattern, pattern])
+        return " AND ".join(clauses), params
+
+    def search(
+        self,
+        pattern: Optional[str] = None,
+        namespace: Optional[str] = None,
+        src_lang: Optional[str] = None,
+        dst_lang: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """条件に一致する翻訳をヒット数の多い順に取得"""
+        self.flush_hits()
+        where, params = self._where(namespace, src_lang, dst_lang, pattern)
+        rows = self._connect().execute(
+            "SELECT namespace, src_lang, dst_lang, text, translation, version, hits, updated_at, expires_at "
+            f"FROM translations WHERE {where} ORDER BY hits DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [dict(zip(self.ENTRY_FIELDS, row)) for row in rows]
+
+    def invalidate(
+        self,
+        namespace: Optional[str] = None,
+        src_lang: Optional[str] = None,
+        dst_lang: Optional[str] = None,
+        pattern: Optional[str] = None,
+    ) -> int:
+        """条件に一致する翻訳を無効化し、無効化した件数を返す"""
+        where, params = self._where(namespace, src_lang, dst_lang, pattern)
+        return self._connect().execute(f"UPDATE translations SET version = NULL WHERE version IS NOT NULL AND {where}", params).rowcount
+
+    def adopt_version(self, namespace: str, version: str) -> int:
+        """版のない古い翻訳 (移行前のファイル) に現在の版を付け、付けた件数を返す"""
+        if not version:
+            return 0
+        return self._connect().execute("UPDATE translations SET version = ? WHERE namespace = ? AND version = ''", (version, namespace)).rowcount
+
+    def stale_entries(self, namespace: str, version: str, limit: int = 20) -> list[tuple[str, str, str]]:
+        """版が古い・無効化済みの翻訳 (再翻訳の候補) をヒット数の多い順に取得
+
+        期限切れの翻訳は候補にしない (要求されたときに翻訳し直す)。
+        """
+        self.flush_hits()
+        rows = self._connect().execute(
+            "SELECT src_lang, dst_lang, text FROM translations WHERE namespace = ? "
+            "AND (version IS NULL OR version != ?) AND (expires_at IS NULL OR expires_at > ?) ORDER BY hits DESC LIMIT ?",
+            (namespace, version, time.time(), limit),
+        )
+        return [tuple(row) for row in rows]
+
+    def summary(self) -> list[dict]:
+        """名前空間・言語ペア・版ごとの件数とヒット数"""
+        self.flush_hits()
+        rows = self._connect().execute(
+            "SELECT namespace, src_lang, dst_lang, version, COUNT(*), SUM(hits), SUM(expires_at IS NOT NULL AND expires_at <= ?) "
+            "FROM translations GROUP BY namespace, src_lang, dst_lang, version",
+            (time.time(),),
+        )
+        return [dict(zip(("namespace", "from", "to", "version", "entries", "hits", "expired"), row)) for row in rows]
+
+    def compact(self, current_versions: Optional[dict[str, str]] = None, vacuum: bool = False) -> int:
+        """期限切れ・無効化済みの翻訳 (current_versions を指定すればその版以外も) を削除し、削除した件数を返す
+
+        vacuum を指定するとファイルも縮小する (その間は他のワーカーの書き込みが待たされる)。
+        """
+        self.flush_hits()
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = conn.execute("DELETE FROM translations WHERE version IS NULL OR expires_at <= ?", (now,)).rowcount
+            for namespace, version in (current_versions or {}).items():
+                removed += conn.execute("DELETE FROM translations WHERE namespace = ? AND version != ?", (namespace, version)).rowcount
+            conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+        if vacuum:
+            conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用、ヒット数はこのプロセス分)"""
+        with self._counter_lock:
+            hits, misses = self._hits, self._misses
+        return {
+            "path": self.path,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+        }
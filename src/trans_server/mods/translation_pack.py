@@ -0,0 +1,127 @@
+"""Read-only, memory-mapped translation pack."""
+
+import hashlib
+import mmap
+import struct
+from typing import Iterable, Optional
+
+# ヘッダー: マジック, バージョン, 件数, 索引の位置, 文字列領域の位置
+HEADER = struct.Struct("<4sIIQQ")
+# 索引の1件: キーのハッシュ, キーの位置, キーの長さ, 翻訳の位置, 翻訳の長さ (ハッシュ順に整列)
+ENTRY = struct.Struct("<QIIII")
+MAGIC = b"XTPK"
+VERSION = 1
+
+
+def pack_key(src_lang: str, dst_lang: str, text: str) -> bytes:
+    """索引のキー (言語ペアとテキストを区切り文字でつなげたUTF-8)"""
+    return f"{src_lang}\0{dst_lang}\0{text}".encode("utf-8")
+
+
+def pack_hash(key: bytes) -> int:
+    """キーの64bitハッシュ"""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+class TranslationPack:
+    """mmapで開く読み取り専用の翻訳パック
+
+    起動時に読み込むのはヘッダーだけで、索引と文字列はOSのページキャッシュから直接参照する。
+    プリフォークしたワーカーは同じページを共有するため、件数が増えてもプロセスごとのメモリは増えない。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            magic, version, self._count, self._index_offset, self._blob_offset = HEADER.unpack_from(self._mmap, 0)
+        except struct.error as e:
+            self.close()
+            raise ValueError(f"Not a translation pack: {path}") from e
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Unsupported translation pack: {path} (magic={magic!r}, version={version})")
+        self._hits = 0
+        self._misses = 0
+
+    def _entry(self, position: int) -> tuple[int, int, int, int, int]:
+        return ENTRY.unpack_from(self._mmap, self._index_offset + position * ENTRY.size)
+
+    def get(self, src_lang: str, dst_lang: str, text: str) -> Optional[str]:
+        """翻訳を取得 (なければNone)"""
+        key = pack_key(src_lang, dst_lang, text)
+        key_hash = pack_hash(key)
+
+        # ハッシュで二分探索し、同じハッシュの範囲でキーを比較する
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry(middle)[0] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+
+        for position in range(low, self._count):
+            entry_hash, key_offset, key_length, value_offset, value_length = self._entry(position)
+            if entry_hash != key_hash:
+                break
+            start = self._blob_offset + key_offset
+            if key_length == len(key) and self._view[start : start + key_length] == key:
+                self._hits += 1
+                start = self._blob_offset + value_offset
+                return str(self._view[start : start + value_length], "utf-8")
+
+        self._misses += 1
+        return None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self):
+        """mmapを閉じる"""
+        self._view.release()
+        self._mmap.close()
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        return {
+            "path": self.path,
+            "entries": self._count,
+            "bytes": len(self._mmap),
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+    @staticmethod
+    def write(path: str, translations: Iterable[tuple[str, str, str, str]]) -> int:
+        """(src_lang, dst_lang, text, translation) の一覧からパックを書き出す (同じキーは後のものを優先)
+
+        Returns:
+            書き出した件数
+        """
+        entries: dict[bytes, bytes] = {}
+        for src_lang, dst_lang, text, translation in translations:
+            entries[pack_key(src_lang, dst_lang, text)] = translation.encode("utf-8")
+
+        index = []
+        blob = bytearray()
+        for key, value in entries.items():
+            key_offset = len(blob)
+            blob += key
+            value_offset = len(blob)
+            blob += value
+            index.append((pack_hash(key), key_offset, len(key), value_offset, len(value)))
+        if len(blob) > 0xFFFFFFFF:
+            raise ValueError("Translation pack is too large (string data exceeds 4GiB)")
+        index.sort()
+
+        index_offset = HEADER.size
+        blob_offset = index_offset + ENTRY.size * len(index)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(index), index_offset, blob_offset))
+            for entry in index:
+                f.write(ENTRY.pack(*entry))
+            f.write(blob)
+        return len(index)
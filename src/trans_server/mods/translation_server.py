@@ -1,37 +1,622 @@
 """Translation server implementation."""
 
+import contextvars
+import math
+import os
+import signal
 import sys
+import threading
 import time
 import traceback
-from flask import Flask, request
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+from flask import Flask, jsonify, make_response, request
+from werkzeug.serving import BaseWSGIServer, make_server
+from ..data_models import ServerConfig
+from ..data_models.tenant_profile import DEFAULT_PROFILE, profile_of
 from ..providers.base_provider import BaseProvider
 from ..utils.language_mapper import LanguageMapper
+from ..utils.profiler import Profiler, ProfilerBusyError
+from ..utils.tracing import RequestTrace, Tracer, span
+from ..utils.usage import usage_scope
+from .admission_controller import AdmissionController, ServerSaturatedError
+from .cache_admin_api import CacheAdminApi
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .fair_queue import FairQueue
+from .model_router import ModelRouter
+from .peer_cache import PEER_CACHE_PATH, PEER_TOKEN_HEADER, PeerCache
+from .prefetcher import Prefetcher, SuccessorModel
+from .rate_limiter import RateLimitExceededError
+from .tenant import Tenant
 from .text_filter import is_dynamic_value, should_skip_translation
+from .translation_cache import SqliteTranslationCache, TranslationCache
+from .translation_pack import TranslationPack
+from .usage_tracker import UsageTracker
+
+RETRANSLATE_BATCH = 20  # 再翻訳の候補を一度に取得する件数
+RETRANSLATE_IDLE_SECONDS = 30.0  # 再翻訳の候補がないときの確認間隔
+PREFETCH_POLL_SECONDS = 0.05  # 先読みが上流の空きを確認する間隔
+PREFETCH_SAVE_SECONDS = 60.0  # 学習したテキストの遷移を保存する間隔
+PREFETCH_RATE_RESERVE = 0.5  # 先読みで使わずに実リクエストのために残すプロファイルの呼び出し枠 (burst に対する割合)
+WORKER_RESTART_DELAY_SECONDS = 1.0  # 異常終了したワーカーを再起動するまでの待ち時間 (連続で失敗するたびに倍にする)
+WORKER_MAX_RESTART_DELAY_SECONDS = 30.0  # 再起動の待ち時間の上限
+WORKER_STABLE_SECONDS = 60.0  # これより長く動いたワーカーの終了は連続失敗に数えない
+WORKER_MAX_CRASHES = 5  # 連続でこの回数だけすぐに異常終了したらサーバーを停止する
 
 
 class TranslationServer:
     """Translation server"""
 
-    def __init__(self, provider: BaseProvider):
+    def __init__(
+        self,
+        provider: BaseProvider,
+        server_config: Optional[ServerConfig] = None,
+        router: Optional[ModelRouter] = None,
+        tenants: Optional[list[Tenant]] = None,
+    ):
         self.provider = provider
+        self.server_config = server_config if server_config else ServerConfig()
+        self.router = router if router else ModelRouter(provider, provider.config.routes)
+        self.admission = AdmissionController(
+            max_concurrency=self.server_config.max_concurrency,
+            max_queue=self.server_config.max_queue,
+            queue_timeout_seconds=self.server_config.queue_timeout_seconds,
+        )
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.cache: TranslationCache | SqliteTranslationCache
+        if self.server_config.cache_path:
+            # 複数ワーカーで共有するキャッシュ
+            self.cache = SqliteTranslationCache(self.server_config.cache_path, self.server_config.cache_max_entries, self.server_config.lease_seconds)
+        else:
+            self.cache = TranslationCache(self.server_config.cache_max_entries)
+        # 出荷用の固定翻訳 (mmapで開くため件数によらず即座に使える)
+        self.pack = TranslationPack(self.server_config.pack_path) if self.server_config.pack_path else None
+        # ゲームごとのプロファイル (既定のプロファイルはコマンドラインの設定)
+        self.default_tenant = Tenant(DEFAULT_PROFILE, self.router, pack=self.pack)
+        self.tenants: dict[str, Tenant] = {DEFAULT_PROFILE: self.default_tenant}
+        for tenant in tenants or []:
+            self.tenants[tenant.name] = tenant
+        for tenant in self.tenants.values():
+            if tenant.ttl_seconds is None:
+                tenant.ttl_seconds = self.server_config.cache_ttl_seconds
+            # 版のない古いキャッシュは現在の設定で作られたものとして引き継ぐ
+            self.cache.adopt_version(tenant.namespace, tenant.version)
+        self._retranslated = 0
+        self._retranslate_failures = 0
+        # 次に要求されそうなテキストの先読み (履歴はfork前に読み込んで全ワーカーで使う)
+        self.prefetcher: Optional[Prefetcher] = None
+        if self.server_config.prefetch_per_second > 0:
+            model = SuccessorModel()
+            history_path = self.server_config.prefetch_history_path
+            if history_path and os.path.exists(history_path):
+                model.load(history_path)
+            self.prefetcher = Prefetcher(model, self.server_config.prefetch_fanout, self.server_config.prefetch_min_confidence)
+        self.peers = PeerCache(
+            self.server_config.peers,
+            timeout_seconds=self.server_config.peer_timeout_seconds,
+            push=self.server_config.peer_push,
+            token=self.server_config.peer_token,
+        )
+        # 翻訳待ちをまたいで上流呼び出しを継続するためのワーカー (同一テキストの呼び出しは1つにまとめる)
+        self.executor = ThreadPoolExecutor(max_workers=self.server_config.background_workers, thread_name_prefix="translate")
+        self._pending: dict[tuple[str, str, str, str], Future] = {}
+        # バックグラウンド翻訳はプロファイルごとの重みで公平に実行する (executor の FIFO に直接積まない)
+        self._background_queue = FairQueue()
+        self._background_rejections = 0
+        self._pending_lock = threading.Lock()
+        self.tracer = Tracer(
+            sample_rate=self.server_config.trace_sample_rate,
+            buffer_size=self.server_config.trace_buffer_spans,
+            log_path=self.server_config.trace_log_path,
+        )
+        self.profiler = Profiler()
+        pricing = UsageTracker.load_pricing(self.server_config.pricing_path) if self.server_config.pricing_path else None
+        self.usage = UsageTracker(pricing)
+        self.ready = threading.Event()
+        self.ready.set()
         self.app = Flask(__name__)
         self._setup_routes()
 
     def _setup_routes(self):
         """Setup routes"""
         self.app.route("/translate", methods=["GET"])(self.handle_translate)
+        self.app.route("/p/<profile>/translate", methods=["GET"])(self.handle_translate)
         self.app.route("/health", methods=["GET"])(self.handle_health)
+        self.app.route("/stats/routing", methods=["GET"])(self.handle_routing_stats)
+        self.app.route("/stats/usage", methods=["GET"])(self.handle_usage_stats)
+        self.app.route("/debug/trace", methods=["GET"])(self.handle_trace)
+        if self.server_config.profiling:
+            self.app.route("/debug/profile/sample", methods=["GET"])(self.handle_profile_sample)
+            self.app.route("/debug/profile/cprofile", methods=["GET"])(self.handle_profile_cprofile)
+            self.app.route("/debug/memory", methods=["GET", "DELETE"])(self.handle_memory)
+        if self.server_config.admin_token:
+            CacheAdminApi(self.cache, self.tenants, self.server_config.admin_token, self._retranslation_stats).register(self.app)
+        # ピア間の内部エンドポイントはピア共有を設定したときだけ登録し、書き込みには必ずトークンを要求する
+        if self.server_config.peers or self.server_config.peer_token:
+            self.app.route(PEER_CACHE_PATH, methods=["GET"])(self.handle_peer_lookup)
+        if self.server_config.peer_token:
+            self.app.route(PEER_CACHE_PATH, methods=["POST"])(self.handle_peer_store)
+
+    def get_breaker(self, provider: BaseProvider) -> CircuitBreaker:
+        """Get (or create) the circuit breaker for a provider/model pair"""
+        name = f"{provider.config.provider}:{provider.config.model}"
+        breaker = self.breakers.get(name)
+        if breaker is None:
+            breaker = self.breakers.setdefault(
+                name,
+                CircuitBreaker(
+                    name,
+                    failure_threshold=self.server_config.breaker_failure_threshold,
+                    slow_call_seconds=self.server_config.breaker_slow_call_seconds,
+                    cooldown_seconds=self.server_config.breaker_cooldown_seconds,
+                    half_open_probes=self.server_config.breaker_half_open_probes,
+                ),
+            )
+        return breaker
+
+    def call_provider(self, provider: BaseProvider, text: str, src_lang: str, dst_lang: str, tenant: Optional[Tenant] = None) -> str:
+        """Call a provider through its circuit breaker and the admission controller
+
+        Raises:
+            CircuitOpenError: The provider's circuit is open
+            ServerSaturatedError: Too many requests are already waiting for the upstream
+        """
+        tenant = tenant if tenant else self.default_tenant
+        breaker = self.get_breaker(provider)
+        breaker.before_call()
+        try:
+            with span("admission"):
+                # 待ち行列ではプロファイルごとの重みで公平に順番を割り当てる
+                self.admission.acquire(tenant.name, tenant.weight)
+        except ServerSaturatedError:
+            breaker.release_probe()
+            raise
+
+        try:
+            start_time = time.time()
+            with span("provider", provider=provider.config.provider, model=provider.config.model):
+                translation = provider.translate(text, src_lang, dst_lang)
+            breaker.record_success(time.time() - start_time)
+            return translation
+        except Exception:
+            breaker.record_failure()
+            raise
+        finally:
+            self.admission.release()
+
+    def wait_for_shared_translation(self, text: str, src_lang: str, dst_lang: str, tenant: Tenant) -> Optional[str]:
+        """Wait for another worker that holds the lease for this text (None if it gave up without a result)"""
+        deadline = time.monotonic() + self.server_config.lease_seconds
+        while time.monotonic() < deadline:
+            translation = self.cache.peek(src_lang, dst_lang, text, tenant.namespace, tenant.version)
+            if translation is not None:
+                return translation
+            if not self.cache.has_lease(src_lang, dst_lang, text, tenant.namespace):
+                # リース解放直後の書き込みを拾うため、もう一度だけ確認する
+                return self.cache.peek(src_lang, dst_lang, text, tenant.namespace, tenant.version)
+            time.sleep(self.server_config.lease_poll_seconds)
+        return None
+
+    def translate_and_cache(self, text: str, src_lang: str, dst_lang: str, tenant: Optional[Tenant] = None) -> str:
+        """Translate through the routed provider and store the result in the cache
+
+        Raises:
+            RateLimitExceededError: The profile exceeded its upstream call rate
+        """
+        tenant = tenant if tenant else self.default_tenant
+        namespace = tenant.namespace
+        # 他のワーカーが同じテキストを翻訳中なら、その結果を待つ (重複した上流呼び出しを避ける)
+        # 担当のワーカーが結果を残さずにリースを手放したら担当を引き継ぐが、先に別のワーカーが引き継いだら再び待つ
+        waited = False
+        while True:
+            with span("lease"):
+                leased = self.cache.acquire_lease(src_lang, dst_lang, text, namespace)
+            if leased:
+                break
+            waited = True
+            with span("shared_wait"):
+                translation = self.wait_for_shared_translation(text, src_lang, dst_lang, tenant)
+            if translation is not None:
+                return translation
+
+        try:
+            # 待っている間に担当のワーカーが書き込んでからリースを手放していれば、その結果を使う
+            if waited:
+                translation = self.cache.peek(src_lang, dst_lang, text, namespace, tenant.version)
+                if translation is not None:
+                    return translation
+
+            # 他のインスタンスが翻訳済みなら上流を呼ばない
+            if self.peers.peers:
+                with span("peers"):
+                    translation = self.peers.lookup(src_lang, dst_lang, text, namespace, tenant.version)
+                if translation is not None:
+                    self.cache.set(src_lang, dst_lang, text, translation, namespace, tenant.version, tenant.ttl_seconds)
+                    return translation
+
+            # キャッシュにない翻訳だけがプロファイルの呼び出し上限を消費する
+            tenant.acquire_rate()
+            tier_name, provider = tenant.router.select(text)
+            start_time = time.time()
+            with usage_scope() as usage:
+                try:
+                    translation = self.call_provider(provider, text, src_lang, dst_lang, tenant)
+                except Exception:
+                    tenant.router.record_failure(tier_name, time.time() - start_time)
+                    if usage.reported:
+                        self.usage.record(provider.config.provider, provider.config.model, src_lang, dst_lang, text, usage, profile=tenant.name)
+                    raise
+            tenant.router.record_success(tier_name, time.time() - start_time, text, translation, usage)
+            self.usage.record(provider.config.provider, provider.config.model, src_lang, dst_lang, text, usage, translation, tenant.name)
+            self.cache.set(src_lang, dst_lang, text, translation, namespace, tenant.version, tenant.ttl_seconds)
+            self.peers.push(src_lang, dst_lang, text, translation, namespace, tenant.version)
+            return translation
+        finally:
+            self.cache.release_lease(src_lang, dst_lang, text, namespace)
+
+    def _translate_in_background(self, text: str, src_lang: str, dst_lang: str, tenant: Tenant) -> str:
+        """Worker entry point (logs errors since the requester may have already returned)"""
+        try:
+            return self.translate_and_cache(text, src_lang, dst_lang, tenant)
+        except (CircuitOpenError, ServerSaturatedError, RateLimitExceededError):
+            raise
+        except Exception as e:
+            print(f"Background translation error: {e}", file=sys.stderr)
+            raise
+
+    def _run_next_background(self):
+        """Worker entry point: run the next background translation in weighted fair order across profiles"""
+        future, context, text, src_lang, dst_lang, tenant = self._background_queue.get()
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(context.run(self._translate_in_background, text, src_lang, dst_lang, tenant))
+        except Exception as e:
+            future.set_exception(e)
+
+    def submit_translation(self, text: str, src_lang: str, dst_lang: str, tenant: Optional[Tenant] = None) -> Future:
+        """Start a background translation, or join the one already running for the same text
+
+        Raises:
+            ServerSaturatedError: Too many background translations are already pending
+        """
+        tenant = tenant if tenant else self.default_tenant
+        key = (tenant.namespace, src_lang, dst_lang, text)
+        with self._pending_lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            # 実行待ちの翻訳を無制限に溜めず、実行中と待ち行列の上限を超えたら受け付けない
+            max_pending = self.server_config.background_workers + self.server_config.max_queue
+            if len(self._pending) >= max_pending:
+                self._background_rejections += 1
+                raise ServerSaturatedError(f"Background queue is full ({len(self._pending)} pending)")
+            # トレースを引き継ぐため、呼び出し元のコンテキストで実行する
+            future = Future()
+            self._background_queue.put(tenant.name, tenant.weight, (future, contextvars.copy_context(), text, src_lang, dst_lang, tenant))
+            self._pending[key] = future
+        # 空いたワーカーは投入順ではなく、待ち行列から公平な順に1件取り出して実行する
+        self.executor.submit(self._run_next_background)
+
+        def forget(done: Future):
+            with self._pending_lock:
+                if self._pending.get(key) is done:
+                    del self._pending[key]
+
+        future.add_done_callback(forget)
+        return future
+
+    def warmup(self):
+        """Open connections to every routed provider, then report ready"""
+        try:
+            warmed: set[tuple[int, str]] = set()
+            for tenant in self.tenants.values():
+                prefix = "" if tenant is self.default_tenant else f"{tenant.name}/"
+                for tier_name, provider in tenant.router.providers.items():
+                    # 同じクライアント・モデルの組み合わせは一度だけウォームアップする
+                    warmup_key = (id(getattr(provider, "client", provider)), provider.config.model)
+                    if warmup_key in warmed:
+                        continue
+                    warmed.add(warmup_key)
+                    start_time = time.time()
+                    try:
+                        provider.warmup(self.server_config.warmup_probe)
+                        print(f"[{provider.config.provider}] Warmup '{prefix}{tier_name}' done ({time.time() - start_time:.2f}sec)")
+                    except Exception as e:
+                        # ウォームアップの失敗では起動を止めない (実リクエストの失敗はブレーカーが扱う)
+                        print(f"[{provider.config.provider}] Warmup '{prefix}{tier_name}' failed: {e}", file=sys.stderr)
+        finally:
+            self.ready.set()
+
+    def get_health_state(self) -> tuple[str, int]:
+        """Get health state and HTTP status for the supervisor"""
+        if not self.ready.is_set():
+            return "warming_up", 503
+        if any(breaker.state == CircuitBreaker.OPEN for breaker in self.breakers.values()):
+            return "circuit_open", 503
+        if self.admission.saturated:
+            return "saturated", 503
+        return "ok", 200
 
     def handle_health(self):
-        """Health check endpoint"""
-        return "ok", 200, {"Content-Type": "text/plain; charset=utf-8"}
+        """Health check endpoint
+
+        GET /health            -> plain text state (ok / circuit_open / saturated)
+        GET /health?detail=1   -> JSON with breaker and queue state
+        """
+        state, status = self.get_health_state()
+
+        if request.args.get("detail"):
+            detail = {
+                "status": state,
+                "breakers": {name: breaker.snapshot() for name, breaker in self.breakers.items()},
+                "queue": self.admission.snapshot(),
+                "background": {
+                    "pending": len(self._pending),
+                    "max_pending": self.server_config.background_workers + self.server_config.max_queue,
+                    "rejections": self._background_rejections,
+                    "waiting_by_profile": self._background_queue.snapshot(),
+                },
+                "cache": self.cache.snapshot(),
+                "pack": self.pack.snapshot() if self.pack else None,
+                "peers": self.peers.snapshot(),
+                "tracing": self.tracer.snapshot(),
+                "profiles": {name: tenant.snapshot() for name, tenant in self.tenants.items()},
+                "prefetch": self.prefetcher.snapshot() if self.prefetcher else None,
+            }
+            return jsonify(detail), status
+
+        return state, status, {"Content-Type": "text/plain; charset=utf-8"}
+
+    def handle_routing_stats(self):
+        """Per-tier latency and token statistics (for tuning routing thresholds)
+
+        GET /stats/routing?profile={name}
+        """
+        tenant = self.tenants.get(request.args.get("profile") or DEFAULT_PROFILE)
+        if tenant is None:
+            return "", 404, {"Content-Type": "text/plain; charset=utf-8"}
+        return jsonify(tenant.router.snapshot()), 200
+
+    def handle_usage_stats(self):
+        """Token usage and cost per profile, provider, model, language pair and text length
+
+        GET /stats/usage?group=profile,provider,model,pair,length
+        """
+        group = request.args.get("group")
+        try:
+            if group:
+                snapshot = self.usage.snapshot([field.strip() for field in group.split(",") if field.strip()])
+            else:
+                snapshot = self.usage.snapshot()
+        except ValueError as e:
+            return str(e), 400, {"Content-Type": "text/plain; charset=utf-8"}
+        return jsonify(snapshot), 200
+
+    def _report_usage_periodically(self):
+        """Print the usage summary at a fixed interval (only when something changed)"""
+        last_lines: list[str] = []
+        while True:
+            time.sleep(self.server_config.usage_summary_seconds)
+            lines = self.usage.summary()
+            if lines != last_lines:
+                for line in lines:
+                    print(line)
+                last_lines = lines
+
+    def handle_trace(self):
+        """Recent sampled spans in Chrome trace event format (open in chrome://tracing or Perfetto)"""
+        return jsonify(self.tracer.chrome_trace()), 200
+
+    def handle_profile_sample(self):
+        """Sample the stacks of all threads for N seconds (folded stacks for flamegraph.pl / speedscope)
+
+        GET /debug/profile/sample?seconds=10&interval=0.005&idle=0
+        """
+        try:
+            folded = self.profiler.sample(
+                request.args.get("seconds", 10.0, type=float),
+                interval=request.args.get("interval", 0.005, type=float),
+                include_idle=bool(request.args.get("idle", 0, type=int)),
+            )
+        except ProfilerBusyError as e:
+            return str(e), 409, {"Content-Type": "text/plain; charset=utf-8"}
+        return folded, 200, {"Content-Type": "text/plain; charset=utf-8", "Content-Disposition": "attachment; filename=profile.folded"}
+
+    def handle_profile_cprofile(self):
+        """Profile the requests handled in the next N seconds with cProfile (pstats file)
+
+        GET /debug/profile/cprofile?seconds=10
+        """
+        try:
+            data = self.profiler.cprofile(request.args.get("seconds", 10.0, type=float))
+        except ProfilerBusyError as e:
+            return str(e), 409, {"Content-Type": "text/plain; charset=utf-8"}
+        return data, 200, {"Content-Type": "application/octet-stream", "Content-Disposition": "attachment; filename=profile.pstats"}
 
-    def handle_translate(self):
+    def handle_memory(self):
+        """tracemalloc snapshot and difference from the previous snapshot
+
+        GET /debug/memory?limit=30&key=lineno&frames=1   -> start tracing, or take a snapshot
+        DELETE /debug/memory                             -> stop tracing
+        """
+        try:
+            if request.method == "DELETE":
+                self.profiler.memory_stop()
+                return "", 204
+            report = self.profiler.memory_snapshot(
+                limit=request.args.get("limit", 30, type=int),
+                key_type=request.args.get("key", "lineno"),
+                frames=request.args.get("frames", 1, type=int),
+            )
+        except ProfilerBusyError as e:
+            return str(e), 409, {"Content-Type": "text/plain; charset=utf-8"}
+        except ValueError as e:
+            return str(e), 400, {"Content-Type": "text/plain; charset=utf-8"}
+        return report, 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+    def _retranslation_stats(self) -> dict:
+        """Re-translation rate and counters (for the cache admin summary)"""
+        return {
+            "rate_per_second": self.server_config.retranslate_per_second,
+            "translated": self._retranslated,
+            "failures": self._retranslate_failures,
+        }
+
+    def _retranslate_stale(self):
+        """Re-translate invalidated and outdated cache entries, most hit first, while the upstream is idle (expired ones are refetched on demand)"""
+        interval = 1.0 / self.server_config.retranslate_per_second
+        failed: set[tuple[str, str, str, str]] = set()
+        while True:
+            candidates = [
+                (tenant, entry)
+                for tenant in self.tenants.values()
+                for entry in self.cache.stale_entries(tenant.namespace, tenant.version, RETRANSLATE_BATCH)
+                if (tenant.namespace, *entry) not in failed
+            ]
+            if not candidates:
+                time.sleep(RETRANSLATE_IDLE_SECONDS)
+                continue
+
+            for tenant, (src_lang, dst_lang, text) in candidates:
+                # 実リクエストの待ちを増やさないよう、上流に空きがあるときだけ呼ぶ
+                while not self.admission.has_capacity:
+                    time.sleep(interval)
+                try:
+                    self.translate_and_cache(text, src_lang, dst_lang, tenant)
+                    self._retranslated += 1
+                except (CircuitOpenError, ServerSaturatedError, RateLimitExceededError):
+                    # 上流の回復や呼び出し枠の補充を待ってから候補を取り直す
+                    time.sleep(RETRANSLATE_IDLE_SECONDS)
+                    break
+                except Exception as e:
+                    failed.add((tenant.namespace, src_lang, dst_lang, text))
+                    self._retranslate_failures += 1
+                    print(f"Re-translation error: {e}", file=sys.stderr)
+                time.sleep(interval)
+
+    def _predict_next(self, tenant: Tenant, src_lang: str, dst_lang: str, text: str):
+        """Learn the request sequence of this client and queue the strings it is likely to request next"""
+        if self.prefetcher is None:
+            return
+        with span("predict"):
+            stream = (request.remote_addr, tenant.namespace, src_lang, dst_lang)
+            for successor in self.prefetcher.observe(stream, tenant.namespace, src_lang, dst_lang, text):
+                self.prefetcher.offer((tenant.namespace, src_lang, dst_lang, successor), tenant)
+
+    def _prefetch_predicted(self, prefetcher: Prefetcher):
+        """Translate predicted strings that are not cached yet, one at a time and only while spare upstream slots remain"""
+        interval = 1.0 / self.server_config.prefetch_per_second
+        while True:
+            key, tenant = prefetcher.take()
+            namespace, src_lang, dst_lang, text = key
+            packed = tenant.pack.get(src_lang, dst_lang, text) if tenant.pack else None
+            if packed is not None or self.cache.peek(src_lang, dst_lang, text, namespace, tenant.version) is not None:
+                prefetcher.record_skipped()
+                continue
+
+            # 実リクエストのために reserve 分の実行枠は常に空けておく
+            while self.admission.spare_slots <= self.server_config.prefetch_reserve_slots:
+                time.sleep(PREFETCH_POLL_SECONDS)
+            # プロファイルの呼び出し上限も実リクエストの分を残し、足りなければ先読みしない
+            limiter = tenant.rate_limiter
+            if limiter and limiter.tokens < max(1.0, limiter.burst * PREFETCH_RATE_RESERVE) + 1.0:
+                prefetcher.record_dropped()
+                continue
+            try:
+                # 実リクエストが同じテキストを要求したら、この翻訳に合流する
+                self.submit_translation(text, src_lang, dst_lang, tenant).result()
+                prefetcher.record_result(key, True)
+            except Exception:
+                # エラーはバックグラウンド翻訳側で出力済み
+                prefetcher.record_result(key, False)
+            time.sleep(interval)
+
+    def _save_prefetch_history_periodically(self, prefetcher: Prefetcher, path: str):
+        """Save the learned request sequences at a fixed interval (only when something changed)"""
+        saved_transitions = prefetcher.model.transitions
+        while True:
+            time.sleep(PREFETCH_SAVE_SECONDS)
+            transitions = prefetcher.model.transitions
+            if transitions == saved_transitions:
+                continue
+            try:
+                prefetcher.model.save(path)
+                saved_transitions = transitions
+            except OSError as e:
+                print(f"Prefetch history save error: {e}", file=sys.stderr)
+
+    def handle_peer_lookup(self):
+        """Internal cache lookup for peer instances (local cache only, never calls the upstream)
+
+        GET /internal/cache?from={source_lang}&to={target_lang}&text={text}&ns={namespace}&v={version}
+        Returns: 200 with the cached translation, 404 if not cached
+        """
+        if not self.peers.authorized(request.headers.get(PEER_TOKEN_HEADER)):
+            return "", 403, {"Content-Type": "text/plain; charset=utf-8"}
+
+        src_lang = request.args.get("from")
+        dst_lang = request.args.get("to")
+        text = request.args.get("text")
+        namespace = request.args.get("ns", "")
+        version = request.args.get("v", "")
+        if not src_lang or not dst_lang or not text:
+            return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
+
+        # ピアからの問い合わせはローカルのヒット率に含めない
+        tenant = self.tenants.get(profile_of(namespace))
+        translation = tenant.pack.get(src_lang, dst_lang, text) if tenant and tenant.pack else None
+        if translation is None:
+            translation = self.cache.peek(src_lang, dst_lang, text, namespace, version)
+        if translation is None:
+            return "", 404, {"Content-Type": "text/plain; charset=utf-8"}
+        return translation, 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+    def handle_peer_store(self):
+        """Internal cache store for translations pushed by peer instances (not forwarded again)
+
+        POST /internal/cache  {"from": ..., "to": ..., "text": ..., "translation": ..., "ns": ..., "v": ...}
+        """
+        if not self.peers.authorized(request.headers.get(PEER_TOKEN_HEADER)):
+            return "", 403, {"Content-Type": "text/plain; charset=utf-8"}
+
+        payload = request.get_json(silent=True) or {}
+        src_lang = payload.get("from")
+        dst_lang = payload.get("to")
+        text = payload.get("text")
+        translation = payload.get("translation")
+        namespace = payload.get("ns", "")
+        version = payload.get("v", "")
+        if not all(isinstance(value, str) and value for value in (src_lang, dst_lang, text, translation)):
+            return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
+        if not isinstance(namespace, str) or not isinstance(version, str):
+            return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
+
+        tenant = self.tenants.get(profile_of(namespace))
+        ttl_seconds = tenant.ttl_seconds if tenant and tenant.ttl_seconds is not None else self.server_config.cache_ttl_seconds
+        self.cache.set(src_lang, dst_lang, text, translation, namespace, version, ttl_seconds)
+        return "", 204
+
+    def handle_translate(self, profile: Optional[str] = None):
         """Translation endpoint (CustomTranslate specification)
 
-        GET /translate?from={source_lang}&to={target_lang}&text={text}
-        Returns: Plain text translation
+        GET /translate?from={source_lang}&to={target_lang}&text={text}[&profile={name}]
+        GET /p/{name}/translate?from={source_lang}&to={target_lang}&text={text}
+        Returns: Plain text translation (X-Request-ID header identifies the request in logs and traces)
         """
+        tenant = self.tenants.get(profile or request.args.get("profile") or DEFAULT_PROFILE)
+        if tenant is None:
+            return "", 404, {"Content-Type": "text/plain; charset=utf-8"}
+
+        with self.tracer.request("translate", request.headers.get("X-Request-ID")) as trace:
+            with self.profiler.profile_request():
+                response = make_response(self._translate_request(trace, tenant))
+        response.headers["X-Request-ID"] = trace.request_id
+        return response
+
+    def _translate_request(self, trace: RequestTrace, tenant: Tenant):
+        """Translate the current request (handle_translate body, inside the request trace)"""
         # Parse query parameters
         src_lang = request.args.get("from")
         dst_lang = request.args.get("to")
@@ -41,67 +626,271 @@ class TranslationServer:
             # Return error status for missing text parameter
             return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
 
-        # 動的な値(FPS表示など)をチェック(先にチェック)
-        if is_dynamic_value(text):
-            # 動的な値は400を返す(翻訳をキャッシュさせない)
-            return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
+        with span("filter"):
+            # 動的な値(FPS表示など)をチェック(先にチェック)
+            if is_dynamic_value(text):
+                # 動的な値は400を返す(翻訳をキャッシュさせない)
+                return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
 
-        # 翻訳不要なテキスト(数字・空白・記号のみ)をチェック
-        if should_skip_translation(text):
-            # そのまま返す(200で返してキャッシュ)
-            return text, 200, {"Content-Type": "text/plain; charset=utf-8"}
+            # 翻訳不要なテキスト(数字・空白・記号のみ)をチェック
+            if should_skip_translation(text):
+                # そのまま返す(200で返してキャッシュ)
+                return text, 200, {"Content-Type": "text/plain; charset=utf-8"}
 
         # Use fallback languages if not specified
+        config = tenant.provider.config
         if not src_lang:
-            src_lang = self.provider.config.fallback_src_lang if self.provider.config.fallback_src_lang else "ja"
+            src_lang = config.fallback_src_lang if config.fallback_src_lang else "ja"
         if not dst_lang:
-            dst_lang = self.provider.config.fallback_dst_lang if self.provider.config.fallback_dst_lang else "en"
+            dst_lang = config.fallback_dst_lang if config.fallback_dst_lang else "en"
 
         # Validate language codes
         try:
-            LanguageMapper.validate_language_code(src_lang, "from")
-            LanguageMapper.validate_language_code(dst_lang, "to")
+            with span("validate"):
+                LanguageMapper.validate_language_code(src_lang, "from")
+                LanguageMapper.validate_language_code(dst_lang, "to")
         except ValueError as e:
             # Return error status for invalid language codes
             print(f"Language validation error: {e}", file=sys.stderr)
             return "", 400, {"Content-Type": "text/plain; charset=utf-8"}
 
-        try:
-            # Translate
-            # プロバイダー名を取得(表示用)
-            provider_name = self.provider.config.provider
+        # 次に要求されそうなテキストを先読みする
+        self._predict_next(tenant, src_lang, dst_lang, text)
+
+        # 翻訳パックかキャッシュにあれば上流を呼ばずに返す
+        local = self._lookup_local(tenant, src_lang, dst_lang, text)
+        if local is not None:
+            return local, 200, {"Content-Type": "text/plain; charset=utf-8"}
+
+        return self._translate_upstream(trace, tenant, src_lang, dst_lang, text)
 
-            # 送信開始を表示(改行なし)
-            print(f"[{provider_name}] Sending...", end="", flush=True)
+    def _lookup_local(self, tenant: Tenant, src_lang: str, dst_lang: str, text: str) -> Optional[str]:
+        """Look up the translation pack, then the cache (None if the upstream has to be called)"""
+        if tenant.pack:
+            with span("pack"):
+                packed = tenant.pack.get(src_lang, dst_lang, text)
+            if packed is not None:
+                return packed
 
+        with span("cache"):
+            cached = self.cache.get(src_lang, dst_lang, text, tenant.namespace, tenant.version)
+        if cached is not None and self.prefetcher:
+            self.prefetcher.claim((tenant.namespace, src_lang, dst_lang, text))
+        return cached
+
+    def _translate_upstream(self, trace: RequestTrace, tenant: Tenant, src_lang: str, dst_lang: str, text: str):
+        """Translate a text that is not cached yet and map upstream failures to response statuses"""
+        # プロバイダー名を取得(表示用、既定以外はプロファイル名も付ける)
+        config = tenant.provider.config
+        provider_name = config.provider if tenant is self.default_tenant else f"{tenant.name}:{config.provider}"
+
+        try:
             # 時間計測開始
             start_time = time.time()
 
             # 翻訳実行
-            translation = self.provider.translate(text, src_lang, dst_lang)
+            latency_budget = self.server_config.latency_budget_seconds
+            if latency_budget > 0:
+                # 予算内に終わらなければキャッシュされないステータスを返し、翻訳はバックグラウンドで継続
+                # (結果はキャッシュに入るため、XUnityの再試行時に即座に返せる)
+                future = self.submit_translation(text, src_lang, dst_lang, tenant)
+                try:
+                    translation = future.result(timeout=latency_budget)
+                except FutureTimeoutError:
+                    print(f"[{provider_name}] {trace.request_id} deferred (>{latency_budget:.2f}sec)")
+                    return "", 504, {"Content-Type": "text/plain; charset=utf-8", "Retry-After": "1"}
+            else:
+                # 先読みなどで同じテキストを翻訳中なら、その結果を待つ
+                with self._pending_lock:
+                    pending = self._pending.get((tenant.namespace, src_lang, dst_lang, text))
+                translation = pending.result() if pending else self.translate_and_cache(text, src_lang, dst_lang, tenant)
 
             # 経過時間を計算
             elapsed_time = time.time() - start_time
 
-            # 完了を表示(同じ行に追加)
-            print(f" done ({elapsed_time:.2f}sec)")
+            # 完了を1行で表示 (サンプリングされたリクエストは区間ごとの内訳も表示)
+            print(f"[{provider_name}] {trace.request_id} done ({elapsed_time:.2f}sec) {trace.breakdown()}".rstrip())
 
             # Return plain text response (CustomTranslate specification)
             return translation, 200, {"Content-Type": "text/plain; charset=utf-8"}
 
+        except CircuitOpenError as e:
+            # 上流が不調のため即座に失敗させる(待機させない)
+            print(f"[{provider_name}] {trace.request_id} rejected ({e})")
+            # 拒否したブレーカー (ルーティング先の段のものもある) の待ち時間を返す
+            return "", 503, {"Content-Type": "text/plain; charset=utf-8", "Retry-After": str(e.retry_after)}
+
+        except ServerSaturatedError as e:
+            # 待ち行列が満杯のため即座に失敗させる(負荷制限)
+            print(f"[{provider_name}] {trace.request_id} rejected ({e})")
+            return "", 429, {"Content-Type": "text/plain; charset=utf-8", "Retry-After": "1"}
+
+        except RateLimitExceededError as e:
+            # プロファイルの呼び出し上限を超えたため、補充されるまで再試行を待たせる
+            print(f"[{provider_name}] {trace.request_id} rejected ({e})")
+            return "", 429, {"Content-Type": "text/plain; charset=utf-8", "Retry-After": str(math.ceil(e.retry_after))}
+
         except Exception as e:
             # Log error to stderr
-            print(f"Translation error: {e}", file=sys.stderr)
+            print(f"[{provider_name}] {trace.request_id} Translation error: {e}", file=sys.stderr)
             traceback.print_exc()
             # Return error status without error message to prevent translation from being cached
             return "", 500, {"Content-Type": "text/plain; charset=utf-8"}
 
+    def _renew_leases_periodically(self):
+        """Keep the leases of running upstream calls alive (SDK and truncation retries can outlast lease_seconds)"""
+        while True:
+            time.sleep(self.server_config.lease_seconds / 3)
+            try:
+                self.cache.renew_leases()
+            except Exception as e:
+                print(f"Lease renewal error: {e}", file=sys.stderr)
+
+    def _start_background_tasks(self, maintenance: bool = True):
+        """Start warmup (/health returns warming_up until it finishes), the periodic usage summary and the re-translation and prefetch jobs"""
+        if self.server_config.warmup:
+            self.ready.clear()
+            threading.Thread(target=self.warmup, name="warmup", daemon=True).start()
+        if isinstance(self.cache, SqliteTranslationCache):
+            threading.Thread(target=self._renew_leases_periodically, name="lease-renewal", daemon=True).start()
+        if self.server_config.usage_summary_seconds > 0:
+            threading.Thread(target=self._report_usage_periodically, name="usage-summary", daemon=True).start()
+        if maintenance and self.server_config.retranslate_per_second > 0:
+            threading.Thread(target=self._retranslate_stale, name="retranslate", daemon=True).start()
+        if self.prefetcher:
+            threading.Thread(target=self._prefetch_predicted, args=(self.prefetcher,), name="prefetch", daemon=True).start()
+            if self.server_config.prefetch_history_path:
+                threading.Thread(
+                    target=self._save_prefetch_history_periodically,
+                    args=(self.prefetcher, self.server_config.prefetch_history_path),
+                    name="prefetch-history",
+                    daemon=True,
+                ).start()
+
+    def _run_worker(self, server: BaseWSGIServer, index: int):
+        """Worker process entry point (after fork)"""
+        exit_code = 0
+        try:
+            # 親プロセスのSIGTERMハンドラを引き継がない
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            # スレッドと接続はfork後に作る (親プロセスの状態を引き継がない)
+            # 再翻訳は共有キャッシュに対して1つのワーカーだけが行う
+            self._start_background_tasks(maintenance=index == 0)
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            # 親プロセスが異常終了として扱えるように、原因を出力して終了コード1で終わる
+            print(f"Worker {os.getpid()} failed: {e}", file=sys.stderr)
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def _spawn_worker(self, server: BaseWSGIServer, index: int) -> int:
+        """Fork a worker process that serves on the shared listening socket"""
+        pid = os.fork()  # pylint: disable=no-member
+        if pid == 0:
+            self._run_worker(server, index)
+        return pid
+
+    @staticmethod
+    def _stop_workers(workers: dict[int, int]):
+        """Terminate the worker processes and wait for them to exit"""
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in workers:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+    def _run_prefork(self, host: str, port: int):
+        """Pre-fork mode: all workers accept on one socket and share the SQLite cache"""
+        if not hasattr(os, "fork"):
+            raise RuntimeError("Multi-worker mode requires a POSIX system (os.fork)")
+
+        server = make_server(host, port, self.app, threaded=True)
+        workers = {self._spawn_worker(server, index): index for index in range(self.server_config.workers)}
+        started_at = {index: time.monotonic() for index in workers.values()}
+        # ワーカー番号ごとの連続した異常終了の回数
+        crashes = {index: 0 for index in workers.values()}
+        print(f"Started {len(workers)} workers: {', '.join(str(pid) for pid in sorted(workers))}")
+
+        def handle_sigterm(_signum, _frame):
+            raise KeyboardInterrupt
+
+        # SIGTERM でもワーカーを停止してから終了する
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+        try:
+            while workers:
+                pid, status = os.wait()  # pylint: disable=no-member
+                if pid not in workers:
+                    continue
+                index = workers.pop(pid)
+                exit_code = os.waitstatus_to_exitcode(status)  # pylint: disable=no-member
+                # 長く動いていたワーカーの終了は起動直後の失敗の繰り返しとはみなさない
+                if time.monotonic() - started_at[index] >= WORKER_STABLE_SECONDS:
+                    crashes[index] = 0
+                crashes[index] += 1
+                if crashes[index] >= WORKER_MAX_CRASHES:
+                    raise RuntimeError(f"Worker {index} exited {crashes[index]} times in a row (last exit code {exit_code}), stopping the server")
+                # 起動直後に失敗し続けるワーカーを詰めて再起動しないように、待ち時間を倍々に延ばす
+                delay = min(WORKER_RESTART_DELAY_SECONDS * 2 ** (crashes[index] - 1), WORKER_MAX_RESTART_DELAY_SECONDS)
+                print(f"Worker {pid} exited (exit code {exit_code}), restarting in {delay:.1f}sec", file=sys.stderr)
+                time.sleep(delay)
+                workers[self._spawn_worker(server, index)] = index
+                started_at[index] = time.monotonic()
+        except KeyboardInterrupt:
+            self._stop_workers(workers)
+            print("Workers stopped")
+        except RuntimeError:
+            self._stop_workers(workers)
+            raise
+        finally:
+            server.server_close()
+
     def start(self, host: str, port: int):
         """Start server"""
         print(f"Translation server starting: http://{host}:{port}")
         print(f"Provider: {self.provider.config.provider}")
         print(f"Model: {self.provider.config.model}")
+        print(f"Max concurrency: {self.server_config.max_concurrency} (queue: {self.server_config.max_queue})")
+        for tier in self.router.tiers:
+            tier_provider = self.router.providers[tier.name]
+            print(f"Route '{tier.name}': {tier_provider.config.provider} / {tier_provider.config.model}")
+        if self.server_config.latency_budget_seconds > 0:
+            print(f"Latency budget: {self.server_config.latency_budget_seconds:.2f}sec ({self.server_config.background_workers} background workers)")
+        if self.server_config.cache_path:
+            print(f"Shared cache: {self.server_config.cache_path}")
+        print(f"Cache version: {self.default_tenant.version}")
+        if self.server_config.retranslate_per_second > 0:
+            print(f"Re-translation: {self.server_config.retranslate_per_second}/sec while the upstream is idle")
+        if self.prefetcher:
+            print(
+                f"Prefetch: {self.server_config.prefetch_per_second}/sec, keeping {self.server_config.prefetch_reserve_slots} upstream slots free "
+                f"({self.prefetcher.model.snapshot()['sources']} learned texts)"
+            )
+        if self.pack:
+            print(f"Translation pack: {self.pack.path} ({len(self.pack)} entries)")
+        if self.peers.peers:
+            print(f"Peers: {', '.join(self.peers.peers)}{' (push)' if self.peers.push_enabled else ''}")
         if self.provider.config.summary:
             print(f"App summary: {self.provider.config.summary}")
+        for tenant in self.tenants.values():
+            if tenant is self.default_tenant:
+                continue
+            config = tenant.provider.config
+            rate = f", {tenant.rate_limiter.rate_per_second}/sec" if tenant.rate_limiter else ""
+            print(f"Profile '{tenant.name}': {config.provider} / {config.model} (/p/{tenant.name}/translate, weight {tenant.weight}{rate})")
         print("Press Ctrl+C to exit")
+        if self.server_config.workers > 1:
+            self._run_prefork(host, port)
+            return
+        self._start_background_tasks()
         self.app.run(host=host, port=port)
@@ -0,0 +1,163 @@
+"""Token usage and cost accounting."""
+
+import json
+import threading
+from typing import Optional, Sequence
+from ..utils.usage import Usage
+
+# テキスト長 (文字数) の区分の上限
+LENGTH_BUCKETS = (16, 64, 256, 1024)
+GROUP_FIELDS = ("profile", "provider", "model", "pair", "length")
+
+
+def length_bucket(text: str) -> str:
+    """テキスト長の区分名"""
+    for limit in LENGTH_BUCKETS:
+        if len(text) <= limit:
+            return f"<={limit}"
+    return f">{LENGTH_BUCKETS[-1]}"
+
+
+class UsageStats:
+    """集計キーごとのトークン数"""
+
+    __slots__ = ("calls", "errors", "reported_calls", "input_tokens", "output_tokens", "cached_tokens", "input_chars", "output_chars")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.reported_calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+        self.input_chars = 0
+        self.output_chars = 0
+
+    def add(self, other: "UsageStats"):
+        """別の集計を加算"""
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class UsageTracker:
+    """プロファイル・プロバイダ・モデル・言語ペア・テキスト長ごとのトークン数と費用の集計
+
+    トークン数はプロバイダのAPI応答に含まれる実際の値 (報告されない呼び出しは reported_calls に含まれない)。
+    料金表を指定すると、100万トークンあたりの単価から費用を計算する。
+    """
+
+    def __init__(self, pricing: Optional[dict[str, dict[str, float]]] = None):
+        self.pricing = pricing if pricing else {}
+        self._stats: dict[tuple[str, str, str, str, str], UsageStats] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def load_pricing(path: str) -> dict[str, dict[str, float]]:
+        """料金表 (JSON) を読み込む
+
+        {"gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.6}, "anthropic:claude-3-5-haiku-latest": {...}}
+        単価は100万トークンあたり。キーは "provider:model" または "model"。
+        """
+        with open(path, encoding="utf-8") as f:
+            pricing = json.load(f)
+        if not isinstance(pricing, dict) or not all(isinstance(price, dict) for price in pricing.values()):
+            raise ValueError(f"Pricing file must be a JSON object of per-model prices: {path}")
+        for name, price in pricing.items():
+            if "input" not in price or "output" not in price:
+                raise ValueError(f"Price for '{name}' needs 'input' and 'output' (per 1M tokens)")
+        return pricing
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        src_lang: str,
+        dst_lang: str,
+        text: str,
+        usage: Usage,
+        translation: Optional[str] = None,
+        profile: str = "default",
+    ):
+        """1回の翻訳を記録 (translation が None なら失敗した呼び出し)"""
+        key = (profile, provider, model, f"{src_lang}-{dst_lang}", length_bucket(text))
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = UsageStats()
+            stats.calls += 1
+            if translation is None:
+                stats.errors += 1
+            else:
+                stats.output_chars += len(translation)
+            stats.input_chars += len(text)
+            if usage.reported:
+                stats.reported_calls += 1
+                stats.input_tokens += usage.input_tokens
+                stats.output_tokens += usage.output_tokens
+                stats.cached_tokens += usage.cached_tokens
+
+    def cost(self, provider: str, model: str, stats: UsageStats) -> Optional[float]:
+        """費用 (料金表にないモデルはNone)"""
+        price = self.pricing.get(f"{provider}:{model}") or self.pricing.get(model)
+        if price is None:
+            return None
+        uncached = stats.input_tokens - stats.cached_tokens
+        cached_price = price.get("cached_input", price["input"])
+        return (uncached * price["input"] + stats.cached_tokens * cached_price + stats.output_tokens * price["output"]) / 1_000_000
+
+    def snapshot(self, group_by: Sequence[str] = GROUP_FIELDS) -> dict:
+        """指定した項目ごとに集計した統計"""
+        unknown = [field for field in group_by if field not in GROUP_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown group field(s): {', '.join(unknown)} (choose from {', '.join(GROUP_FIELDS)})")
+
+        with self._lock:
+            items = list(self._stats.items())
+
+        groups: dict[tuple[str, ...], UsageStats] = {}
+        total = UsageStats()
+        total_cost: Optional[float] = None
+        costs: dict[tuple[str, ...], Optional[float]] = {}
+        for key, stats in items:
+            fields = dict(zip(GROUP_FIELDS, key))
+            group_key = tuple(fields[field] for field in group_by)
+            groups.setdefault(group_key, UsageStats()).add(stats)
+            total.add(stats)
+
+            # 費用はモデルごとの単価で計算してから合算する
+            cost = self.cost(fields["provider"], fields["model"], stats)
+            if cost is not None:
+                costs[group_key] = (costs.get(group_key) or 0.0) + cost
+                total_cost = (total_cost or 0.0) + cost
+
+        def as_dict(stats: UsageStats, cost: Optional[float]) -> dict:
+            return {
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "reported_calls": stats.reported_calls,
+                "input_tokens": stats.input_tokens,
+                "output_tokens": stats.output_tokens,
+                "cached_tokens": stats.cached_tokens,
+                "avg_input_tokens": round(stats.input_tokens / stats.reported_calls, 1) if stats.reported_calls else None,
+                "avg_output_tokens": round(stats.output_tokens / stats.reported_calls, 1) if stats.reported_calls else None,
+                "input_chars": stats.input_chars,
+                "output_chars": stats.output_chars,
+                "cost": round(cost, 6) if cost is not None else None,
+            }
+
+        return {
+            "total": as_dict(total, total_cost),
+            "groups": [{**dict(zip(group_by, group_key)), **as_dict(stats, costs.get(group_key))} for group_key, stats in sorted(groups.items())],
+        }
+
+    def summary(self) -> list[str]:
+        """プロバイダ・モデル・言語ペアごとの要約 (定期出力用)"""
+        snapshot = self.snapshot(("provider", "model", "pair"))
+        lines = []
+        for group in snapshot["groups"]:
+            cost = f" cost=${group['cost']:.4f}" if group["cost"] is not None else ""
+            lines.append(
+                f"[usage] {group['provider']}:{group['model']} {group['pair']} calls={group['calls']} "
+                f"in={group['input_tokens']} (cached {group['cached_tokens']}) out={group['output_tokens']}{cost}"
+            )
+        return lines
@@ -1,12 +1,29 @@
 """Translation provider implementations."""
 
+import importlib
+from typing import TYPE_CHECKING, Any
 from .base_provider import BaseProvider
-from .openai_provider import OpenAIProvider
-from .openai_compatible_provider import OpenAICompatibleProvider
-from .anthropic_provider import AnthropicProvider
-from .anthropic_compatible_provider import AnthropicCompatibleProvider
-from .ollama_provider import OllamaProvider
-from .gemini_provider import GeminiProvider
+from .registry import BUILTIN_PROVIDERS, available_providers, get_provider_class
+
+if TYPE_CHECKING:
+    # 型チェッカーとリンター向けの宣言 (実行時は下の __getattr__ で遅延読み込みする)
+    from .anthropic_compatible_provider import AnthropicCompatibleProvider
+    from .anthropic_provider import AnthropicProvider
+    from .gemini_provider import GeminiProvider
+    from .ollama_provider import OllamaProvider
+    from .openai_compatible_provider import OpenAICompatibleProvider
+    from .openai_provider import OpenAIProvider
+
+# プロバイダクラスは参照されたときに読み込む (未使用のSDKをimportしない)
+_LAZY_CLASSES = {class_name: module_name for module_name, class_name, _ in BUILTIN_PROVIDERS.values()}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_CLASSES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module_name, __name__), name)
+
 
 __all__ = [
     "BaseProvider",
@@ -16,4 +33,6 @@ __all__ = [
     "AnthropicCompatibleProvider",
     "OllamaProvider",
     "GeminiProvider",
+    "available_providers",
+    "get_provider_class",
 ]
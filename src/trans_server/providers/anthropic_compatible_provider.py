@@ -2,9 +2,11 @@
 
 import argparse
 from dataclasses import dataclass
+import anthropic
 from anthropic import Anthropic
 from ..data_models import ProviderConfig
 from ..mods.prompt_builder import PromptBuilder
+from ..utils.http_transport import HttpTransport
 from .anthropic_provider import AnthropicProvider, AnthropicConfig
 
 
@@ -34,8 +36,9 @@ class AnthropicCompatibleProvider(AnthropicProvider):
         self.client = Anthropic(
             api_key=anthropic_config.api_key if anthropic_config.api_key else "sk-ant-no-key-required",
             base_url=anthropic_config.api_base,
+            **HttpTransport.sdk_options(config.transport, anthropic),
         )
-        self.prompt_builder = PromptBuilder()
+        self.prompt_builder = PromptBuilder(config.prompt_profile)
 
     @staticmethod
     def add_provider_args(parser: argparse.ArgumentParser) -> None:
@@ -46,13 +49,7 @@ class AnthropicCompatibleProvider(AnthropicProvider):
     @staticmethod
     def create_from_args(args: argparse.Namespace) -> "AnthropicCompatibleProvider":
         """Create provider instance from arguments"""
-        config = ProviderConfig(
-            provider=args.provider,
-            model=args.model,
-            summary=args.summary,
-            fallback_src_lang=args.fallback_from,
-            fallback_dst_lang=args.fallback_to,
-        )
+        config = ProviderConfig.from_args(args)
         anthropic_config = AnthropicCompatibleConfig(
             api_key=args.api_key,
             api_base=args.api_base,
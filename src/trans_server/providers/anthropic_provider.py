@@ -2,10 +2,13 @@
 
 import argparse
 from dataclasses import dataclass
-from anthropic import Anthropic
+import anthropic
+from anthropic import NOT_GIVEN, Anthropic
 from anthropic.types import TextBlock, ThinkingBlock
 from ..data_models import ProviderConfig
 from ..mods.prompt_builder import PromptBuilder
+from ..utils.http_transport import HttpTransport
+from ..utils.usage import report_usage
 from .base_provider import BaseProvider
 
 
@@ -24,8 +27,8 @@ class AnthropicProvider(BaseProvider):
         self.anthropic_config = anthropic_config
 
         # Initialize Anthropic client (official API, no base_url)
-        self.client = Anthropic(api_key=anthropic_config.api_key)
-        self.prompt_builder = PromptBuilder()
+        self.client = Anthropic(api_key=anthropic_config.api_key, **HttpTransport.sdk_options(config.transport, anthropic))
+        self.prompt_builder = PromptBuilder(config.prompt_profile)
 
     def list_models(self) -> list[str]:
         """Get available models"""
@@ -47,33 +50,42 @@ class AnthropicProvider(BaseProvider):
         system_prompt = self.prompt_builder.build_system_prompt(self.config.summary)
         user_prompt = self.prompt_builder.build_translation_request(text, src_lang, dst_lang)
 
-        # API call
-        response = self.client.messages.create(
-            model=self.config.model,
-            max_tokens=4096,
-            system=system_prompt,
-            messages=[{"role": "user", "content": user_prompt}],
-            temperature=0.3,
-        )
-
-        # Extract translation from response content
-        # Handle both TextBlock and ThinkingBlock (newer models may include thinking process)
-        content_text = ""
-        for content_block in response.content:
-            if isinstance(content_block, TextBlock):
-                content_text = content_block.text
-                break  # Use the first text block
-            if isinstance(content_block, ThinkingBlock):
-                # Skip thinking blocks, look for actual text response
-                continue
-            raise ValueError(f"Invalid response format from Anthropic API: {type(content_block)}")
-
-        if not content_text:
-            raise ValueError("No text content found in Anthropic API response")
-
-        translation = self.prompt_builder.extract_translation(content_text)
-
-        return translation
+        def request(max_tokens: int) -> tuple[str, bool]:
+            # API call
+            response = self.client.messages.create(
+                model=self.config.model,
+                max_tokens=max_tokens,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_prompt}],
+                temperature=0.3,
+                stop_sequences=self.stop_sequences or NOT_GIVEN,
+            )
+
+            # input_tokens excludes prompt cache reads and writes
+            usage = response.usage
+            if usage:
+                cache_read = usage.cache_read_input_tokens or 0
+                report_usage((usage.input_tokens or 0) + cache_read + (usage.cache_creation_input_tokens or 0), usage.output_tokens, cache_read)
+
+            # Extract translation from response content
+            # Handle both TextBlock and ThinkingBlock (newer models may include thinking process)
+            content_text = ""
+            for content_block in response.content:
+                if isinstance(content_block, TextBlock):
+                    content_text = content_block.text
+                    break  # Use the first text block
+                if isinstance(content_block, ThinkingBlock):
+                    # Skip thinking blocks, look for actual text response
+                    continue
+                raise ValueError(f"Invalid response format from Anthropic API: {type(content_block)}")
+
+            if response.stop_reason == "max_tokens":
+                return content_text, True
+            if not content_text:
+                raise ValueError("No text content found in Anthropic API response")
+            return content_text, False
+
+        return self.generate_translation(text, src_lang, dst_lang, request)
 
     @staticmethod
     def add_provider_args(parser: argparse.ArgumentParser) -> None:
@@ -83,12 +95,6 @@ class AnthropicProvider(BaseProvider):
     @staticmethod
     def create_from_args(args: argparse.Namespace) -> "AnthropicProvider":
         """Create provider instance from arguments"""
-        config = ProviderConfig(
-            provider=args.provider,
-            model=args.model,
-            summary=args.summary,
-            fallback_src_lang=args.fallback_from,
-            fallback_dst_lang=args.fallback_to,
-        )
+        config = ProviderConfig.from_args(args)
         anthropic_config = AnthropicConfig(api_key=args.api_key)
         return AnthropicProvider(config, anthropic_config)
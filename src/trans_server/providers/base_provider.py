@@ -1,14 +1,27 @@
 """Base provider interface."""
 
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
 import argparse
+import copy
+import dataclasses
 from ..data_models import ProviderConfig
+from ..utils.token_estimator import TokenEstimator
+from ..utils.tracing import span
+
+if TYPE_CHECKING:
+    from ..mods.prompt_builder import PromptBuilder
+
+
+class TruncatedResponseError(ValueError):
+    """Response was cut off at the output token limit"""
 
 
 class BaseProvider(ABC):
     """Translation provider base class"""
 
+    prompt_builder: "PromptBuilder"
+
     def __init__(self, config: ProviderConfig):
         self.config = config
 
@@ -34,6 +47,59 @@ class BaseProvider(ABC):
         """Create provider instance from arguments"""
         ...
 
+    def warmup(self, probe: bool = False) -> None:
+        """Open connections before serving (and optionally send a short translation)"""
+        self.list_models()
+        if probe:
+            self.translate("OK", "en", self.config.fallback_dst_lang if self.config.fallback_dst_lang else "ja")
+
+    @property
+    def reasoning_model(self) -> bool:
+        """Whether the model spends hidden reasoning tokens from the output budget (no adaptive budget or stop sequences)"""
+        return False
+
+    @property
+    def stop_sequences(self) -> list[str]:
+        """Stop sequences to pass to the API (empty when disabled)"""
+        if not self.config.use_stop_sequence or self.reasoning_model:
+            return []
+        return [self.prompt_builder.STOP_SEQUENCE]
+
+    def output_budget(self, text: str, src_lang: str, dst_lang: str) -> int:
+        """Initial output token budget (max_tokens) for a request"""
+        # 推論トークンも予算に数えるモデルは、見積もった予算では本文が出る前に打ち切られる
+        if not self.config.adaptive_output_budget or self.reasoning_model:
+            return self.config.max_output_tokens
+        return TokenEstimator.estimate_output_budget(text, src_lang, dst_lang, maximum=self.config.max_output_tokens)
+
+    def _next_output_budget(self, max_tokens: int) -> int:
+        """Budget for retrying a truncated response"""
+        if max_tokens >= self.config.max_output_tokens:
+            raise TruncatedResponseError(f"Response truncated at the output token limit ({max_tokens} tokens)")
+        return min(max_tokens * 2, self.config.max_output_tokens)
+
+    def generate_translation(self, text: str, src_lang: str, dst_lang: str, request: Callable[[int], tuple[str, bool]]) -> str:
+        """Run an API request with an adaptive output budget and extract the translation
+
+        request receives max_tokens and returns (response text, truncated).
+        A truncated response is retried with a doubled budget up to config.max_output_tokens.
+        """
+        max_tokens = self.output_budget(text, src_lang, dst_lang)
+        with span("request", max_tokens=max_tokens):
+            content, truncated = request(max_tokens)
+        while truncated:
+            max_tokens = self._next_output_budget(max_tokens)
+            with span("request", max_tokens=max_tokens, retry=True):
+                content, truncated = request(max_tokens)
+
+        return self.prompt_builder.extract_translation(self.prompt_builder.restore_stop_sequence(content))
+
+    def with_overrides(self, **overrides: Any) -> "BaseProvider":
+        """Create a provider sharing this client but with some config fields replaced (e.g. model)"""
+        provider = copy.copy(self)
+        provider.config = dataclasses.replace(self.config, **overrides)
+        return provider
+
     def _resolve_language(self, lang: Optional[str], fallback: Optional[str], lang_type: str) -> str:
         """Resolve language code (with fallback)"""
         if lang:
@@ -1,15 +1,18 @@
 """Google AI Studio (Gemini) プロバイダ"""
 
 import argparse
+import threading
+import time
 from dataclasses import dataclass
+from typing import Any, Optional
 
-try:
-    import google.generativeai as genai
-except ImportError as e:
-    raise ImportError(f"google-generativeai パッケージのインストールが必要です: pip install google-generativeai. Error: {e}") from e
+from google import genai
+from google.genai import errors, types
 
 from ..data_models import ProviderConfig
 from ..mods.prompt_builder import PromptBuilder
+from ..utils.http_transport import HttpTransport
+from ..utils.usage import report_usage
 from .base_provider import BaseProvider
 
 
@@ -18,57 +21,125 @@ class GeminiConfig:
     """Gemini プロバイダ設定 (--api-base は不要)"""
 
     api_key: str
+    context_cache: bool = False  # システムプロンプトを明示的なコンテキストキャッシュに載せる
+    context_cache_ttl: int = 3600  # コンテキストキャッシュの有効秒数
 
 
 class GeminiProvider(BaseProvider):
     """Google AI Studio (Gemini) API プロバイダ"""
 
+    CONTEXT_CACHE_RETRY_SECONDS = 60.0  # 一時的なエラーでコンテキストキャッシュを作れなかったときの再試行間隔
+
     def __init__(self, config: ProviderConfig, gemini_config: GeminiConfig):
         super().__init__(config)
         self.gemini_config = gemini_config
-        # Configure API key globally
-        genai.configure(api_key=gemini_config.api_key)
-        self.prompt_builder = PromptBuilder()
+
+        # クライアントは1つを使い回す (接続タイムアウトとトレース用のフックは HttpTransport が構築した httpx クライアントで扱う)
+        self.client = genai.Client(
+            api_key=gemini_config.api_key,
+            http_options=types.HttpOptions(**HttpTransport.genai_options(config.transport)),
+        )
+        self.prompt_builder = PromptBuilder(config.prompt_profile)
+
+        # (モデル名, システムプロンプト) ごとのコンテキストキャッシュ名と作成時刻
+        self._context_caches: dict[tuple[str, str], tuple[str, float]] = {}
+        # (モデル名, システムプロンプト) ごとの、次にキャッシュの作成を試みてよい時刻 (作れない組み合わせは無限大)
+        self._context_cache_retry_at: dict[tuple[str, str], float] = {}
+        self._context_cache_lock = threading.Lock()
 
     def list_models(self) -> list[str]:
         """利用可能なモデル一覧を取得"""
         # List models that support generateContent
         models = []
-        for model in genai.list_models():
-            if "generateContent" in model.supported_generation_methods:
+        for model in self.client.models.list():
+            if model.name and "generateContent" in (model.supported_actions or []):
                 models.append(model.name)
         return models
 
-    def translate(self, text: str, src_lang: str, dst_lang: str) -> str:
-        """テキストを翻訳"""
-        src_lang = self.resolve_source_language(src_lang)
-        dst_lang = self.resolve_target_language(dst_lang)
+    def _get_context_cache(self, system_prompt: str) -> Optional[str]:
+        """システムプロンプトのコンテキストキャッシュ名を取得 (期限が近ければ作り直す)"""
+        if not self.gemini_config.context_cache:
+            return None
+
+        key = (self.config.model, system_prompt)
+        with self._context_cache_lock:
+            cached = self._context_caches.get(key)
+            if cached and time.time() - cached[1] < self.gemini_config.context_cache_ttl * 0.9:
+                return cached[0]
+            if time.time() < self._context_cache_retry_at.get(key, 0.0):
+                return None
+            return self._create_context_cache(key, system_prompt)
+
+    def _create_context_cache(self, key: tuple[str, str], system_prompt: str) -> Optional[str]:
+        """コンテキストキャッシュを作成 (作れなければ再試行の時刻を記録してNone)"""
+        try:
+            cache = self.client.caches.create(
+                model=self.config.model,
+                config=types.CreateCachedContentConfig(
+                    system_instruction=system_prompt,
+                    ttl=f"{self.gemini_config.context_cache_ttl}s",
+                ),
+            )
+        except errors.ClientError as e:
+            # キャッシュには最小トークン数があるため、短いシステムプロンプトや非対応のモデルでは作成できない
+            # (設定は他の段・プロファイルと共有しているため、この組み合わせだけ諦める)
+            print(f"[gemini] Context cache unavailable for {self.config.model}, sending system instruction inline: {e}")
+            self._context_cache_retry_at[key] = float("inf")
+            return None
+        except Exception as e:
+            # 一時的なエラーは間隔を空けて作り直す
+            print(f"[gemini] Context cache creation failed, retrying in {self.CONTEXT_CACHE_RETRY_SECONDS:.0f}sec: {e}")
+            self._context_cache_retry_at[key] = time.time() + self.CONTEXT_CACHE_RETRY_SECONDS
+            return None
+
+        if cache.name:
+            self._context_caches[key] = (cache.name, time.time())
+        return cache.name or None
 
+    def build_request(self, text: str, src_lang: str, dst_lang: str, max_tokens: int) -> dict[str, Any]:
+        """generate_content に渡すリクエストを構築"""
         # Build prompts
         system_prompt = self.prompt_builder.build_system_prompt(self.config.summary)
         user_prompt = self.prompt_builder.build_translation_request(text, src_lang, dst_lang)
 
-        # Create model instance
-        model_instance = genai.GenerativeModel(
-            self.config.model,
-            system_instruction=system_prompt,
+        cache_name = self._get_context_cache(system_prompt)
+        config = types.GenerateContentConfig(
+            system_instruction=None if cache_name else system_prompt,
+            cached_content=cache_name,
+            temperature=0.3,
+            max_output_tokens=max_tokens,
+            stop_sequences=self.stop_sequences or None,
         )
+        return {"model": self.config.model, "contents": user_prompt, "config": config}
 
-        try:
-            # Generate content
-            response = model_instance.generate_content(
-                user_prompt,
-                generation_config=genai.GenerationConfig(temperature=0.3),
-            )
+    @staticmethod
+    def _parse_response(response: types.GenerateContentResponse) -> tuple[str, bool]:
+        """応答テキストと打ち切りの有無を取得 (トークン数も報告)"""
+        if response and response.usage_metadata:
+            usage = response.usage_metadata
+            # Thinking tokens are billed as output
+            report_usage(usage.prompt_token_count, (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0), usage.cached_content_token_count)
 
-            # Parse response
-            if response and response.text:
-                content = response.text
-                translation = self.prompt_builder.extract_translation(content)
-                return translation
+        if response and response.candidates:
+            truncated = response.candidates[0].finish_reason == types.FinishReason.MAX_TOKENS
+            content = response.text or ""
+            if content or truncated:
+                return content, truncated
+
+        raise ValueError("Empty response from Gemini API")
+
+    def translate(self, text: str, src_lang: str, dst_lang: str) -> str:
+        """テキストを翻訳"""
+        src_lang = self.resolve_source_language(src_lang)
+        dst_lang = self.resolve_target_language(dst_lang)
 
-            raise ValueError("Empty response from Gemini API")
+        def request(max_tokens: int) -> tuple[str, bool]:
+            # Generate content
+            response = self.client.models.generate_content(**self.build_request(text, src_lang, dst_lang, max_tokens))
+            return self._parse_response(response)
 
+        try:
+            return self.generate_translation(text, src_lang, dst_lang, request)
         except Exception as e:
             raise RuntimeError(f"Gemini API translation failed: {e}") from e
 
@@ -76,16 +147,20 @@ class GeminiProvider(BaseProvider):
     def add_provider_args(parser: argparse.ArgumentParser) -> None:
         """Gemini プロバイダの引数を追加"""
         parser.add_argument("--api-key", required=True, help="Google AI Studio API key")
+        parser.add_argument(
+            "--context-cache",
+            action="store_true",
+            help="Put the system instruction in an explicit context cache (needs a prompt above the model's minimum cache size)",
+        )
+        parser.add_argument("--context-cache-ttl", type=int, default=3600, help="Context cache lifetime in seconds (default: 3600)")
 
     @staticmethod
     def create_from_args(args: argparse.Namespace) -> "GeminiProvider":
         """引数からプロバイダインスタンスを作成"""
-        config = ProviderConfig(
-            provider=args.provider,
-            model=args.model,
-            summary=args.summary,
-            fallback_src_lang=args.fallback_from,
-            fallback_dst_lang=args.fallback_to,
+        config = ProviderConfig.from_args(args)
+        gemini_config = GeminiConfig(
+            api_key=args.api_key,
+            context_cache=getattr(args, "context_cache", False),
+            context_cache_ttl=getattr(args, "context_cache_ttl", 3600),
         )
-        gemini_config = GeminiConfig(api_key=args.api_key)
         return GeminiProvider(config, gemini_config)
@@ -1,10 +1,16 @@
 """Ollama provider implementation."""
 
 import argparse
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
+from typing import Any, Iterator, Optional, Union
 import ollama
-from ..data_models import ProviderConfig
+from ..data_models import ProviderConfig, TransportConfig
 from ..mods.prompt_builder import PromptBuilder
+from ..utils.http_transport import HttpTransport
+from ..utils.usage import report_usage
 from .base_provider import BaseProvider
 
 
@@ -12,7 +18,82 @@ from .base_provider import BaseProvider
 class OllamaConfig:
     """Ollama-specific configuration"""
 
-    api_base: str = "http://localhost:11434"
+    api_base: str = "http://localhost:11434"  # Comma-separated for multiple hosts
+    keep_alive: Optional[Union[str, float]] = None  # How long the model stays loaded (e.g. "30m", -1 = forever)
+    num_ctx: Optional[int] = None  # Context window (changing it between requests reloads the model)
+    parallel: Optional[int] = None  # Concurrent requests per host (match OLLAMA_NUM_PARALLEL)
+    preload: bool = False  # Load the model on every host at startup
+
+    def __post_init__(self):
+        """Validate after initialization"""
+        if not self.hosts:
+            raise ValueError("At least one Ollama host is required")
+        if self.parallel is not None and self.parallel < 1:
+            raise ValueError("Parallel requests per host must be at least 1")
+
+    @property
+    def hosts(self) -> list[str]:
+        """Host URLs"""
+        return [host.strip() for host in self.api_base.split(",") if host.strip()]
+
+    @staticmethod
+    def parse_keep_alive(value: Optional[str]) -> Optional[Union[str, float]]:
+        """Parse keep_alive (numbers are seconds, anything else is a duration string)"""
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+class OllamaHost:
+    """Single Ollama host with its outstanding request count"""
+
+    def __init__(self, url: str, client: ollama.Client):
+        self.url = url
+        self.client = client
+        self.outstanding = 0
+
+
+class OllamaHostPool:
+    """Least-outstanding-requests balancing over Ollama hosts, limited to the parallel slots of each host"""
+
+    def __init__(self, hosts: list[str], parallel: Optional[int], transport: TransportConfig):
+        if not hosts:
+            raise ValueError("At least one Ollama host is required")
+        self.hosts = [OllamaHost(url, ollama.Client(host=url, **HttpTransport.httpx_options(transport))) for url in hosts]
+        self.parallel = parallel
+        self.wait_timeout = transport.read_timeout
+        self._condition = threading.Condition()
+
+    def _select(self) -> Optional[OllamaHost]:
+        """Pick the host with the fewest outstanding requests that still has a free slot"""
+        candidates = [host for host in self.hosts if self.parallel is None or host.outstanding < self.parallel]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda host: host.outstanding)
+
+    @contextmanager
+    def acquire(self) -> Iterator[OllamaHost]:
+        """Reserve a slot on the least busy host"""
+        deadline = time.monotonic() + self.wait_timeout
+        with self._condition:
+            host = self._select()
+            while host is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No free Ollama slot within {self.wait_timeout}sec")
+                self._condition.wait(remaining)
+                host = self._select()
+            host.outstanding += 1
+
+        try:
+            yield host
+        finally:
+            with self._condition:
+                host.outstanding -= 1
+                self._condition.notify()
 
 
 class OllamaProvider(BaseProvider):
@@ -21,14 +102,55 @@ class OllamaProvider(BaseProvider):
     def __init__(self, config: ProviderConfig, ollama_config: OllamaConfig):
         super().__init__(config)
         self.ollama_config = ollama_config
-        self.client = ollama.Client(host=ollama_config.api_base)
-        self.prompt_builder = PromptBuilder()
+        self.host_pool = OllamaHostPool(ollama_config.hosts, ollama_config.parallel, config.transport)
+        self.client = self.host_pool.hosts[0].client
+        self.prompt_builder = PromptBuilder(config.prompt_profile)
+
+    def _model_options(self) -> dict[str, Any]:
+        """Options that must match between preload and chat (a different num_ctx reloads the model)"""
+        options: dict[str, Any] = {}
+        if self.ollama_config.num_ctx:
+            options["num_ctx"] = self.ollama_config.num_ctx
+        return options
 
     def list_models(self) -> list[str]:
-        """Get available models"""
-        response = self.client.list()
-        # pylint: disable=no-member
-        return [m.model for m in response.models if m.model]  # type: ignore[attr-defined]
+        """Get available models (models of every reachable host, failing only when no host answers)"""
+        models: list[str] = []
+        error: Optional[Exception] = None
+        for host in self.host_pool.hosts:
+            try:
+                response = host.client.list()
+            except Exception as e:  # pylint: disable=broad-except
+                error = e
+                continue
+            # pylint: disable=no-member
+            models.extend(m.model for m in response.models if m.model and m.model not in models)  # type: ignore[attr-defined]
+        if error is not None and not models:
+            raise error
+        return models
+
+    def warmup(self, probe: bool = False) -> None:
+        """Open a connection to (and optionally load the model on) every host so the first request does not pay for it
+
+        A failing host does not stop the others; warmup fails only when no host could be reached.
+        """
+        failures = []
+        for host in self.host_pool.hosts:
+            start_time = time.time()
+            try:
+                if self.ollama_config.preload:
+                    # An empty prompt only loads the model
+                    host.client.generate(model=self.config.model, prompt="", keep_alive=self.ollama_config.keep_alive, options=self._model_options())
+                    print(f"[ollama] Preloaded {self.config.model} on {host.url} ({time.time() - start_time:.2f}sec)")
+                else:
+                    host.client.list()
+            except Exception as e:  # pylint: disable=broad-except
+                failures.append(f"{host.url}: {e}")
+                print(f"[ollama] Warmup of {host.url} failed: {e}")
+        if len(failures) == len(self.host_pool.hosts):
+            raise RuntimeError(f"No Ollama host could be reached ({'; '.join(failures)})")
+        if probe:
+            self.translate("OK", "en", self.config.fallback_dst_lang if self.config.fallback_dst_lang else "ja")
 
     def translate(self, text: str, src_lang: str, dst_lang: str) -> str:
         """Execute translation (1-to-1)"""
@@ -39,37 +161,55 @@ class OllamaProvider(BaseProvider):
         system_prompt = self.prompt_builder.build_system_prompt(self.config.summary)
         user_prompt = self.prompt_builder.build_translation_request(text, src_lang, dst_lang)
 
-        # API call
-        response = self.client.chat(
-            model=self.config.model,
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            options={
+        def request(max_tokens: int) -> tuple[str, bool]:
+            options: dict = {
+                **self._model_options(),
                 "temperature": 0.3,
-            },
-        )
+                "num_predict": max_tokens,
+            }
+            if self.stop_sequences:
+                options["stop"] = self.stop_sequences
 
-        # Extract translation
-        content = response["message"]["content"]
-        translation = self.prompt_builder.extract_translation(content)
+            # API call
+            with self.host_pool.acquire() as host:
+                response = host.client.chat(
+                    model=self.config.model,
+                    messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+                    options=options,
+                    keep_alive=self.ollama_config.keep_alive,
+                )
 
-        return translation
+            # Ollama does not report cached prompt tokens
+            report_usage(response.get("prompt_eval_count"), response.get("eval_count"))
+
+            content = response["message"]["content"]
+            return content, response.get("done_reason") == "length"
+
+        # Extract translation
+        return self.generate_translation(text, src_lang, dst_lang, request)
 
     @staticmethod
     def add_provider_args(parser: argparse.ArgumentParser) -> None:
         """Add Ollama-specific arguments"""
-        parser.add_argument("--api-base", default="http://localhost:11434", help="Ollama server base URL (default: http://localhost:11434)")
+        parser.add_argument(
+            "--api-base",
+            default="http://localhost:11434",
+            help="Ollama server base URL, comma-separated for multiple hosts (default: http://localhost:11434)",
+        )
+        parser.add_argument("--keep-alive", help="How long the model stays loaded after a request (e.g. 30m, 3600, -1 for forever)")
+        parser.add_argument("--num-ctx", type=int, help="Context window size (keep it small for translation-sized prompts)")
+        parser.add_argument("--parallel", type=int, help="Concurrent requests per host (match OLLAMA_NUM_PARALLEL on the server)")
+        parser.add_argument("--preload", action="store_true", help="Load the model on every host at startup")
 
     @staticmethod
     def create_from_args(args: argparse.Namespace) -> "OllamaProvider":
         """Create provider instance from arguments"""
-        config = ProviderConfig(
-            provider=args.provider,
-            model=args.model,
-            summary=args.summary,
-            fallback_src_lang=args.fallback_from,
-            fallback_dst_lang=args.fallback_to,
-        )
+        config = ProviderConfig.from_args(args)
         ollama_config = OllamaConfig(
             api_base=getattr(args, "api_base", "http://localhost:11434"),
+            keep_alive=OllamaConfig.parse_keep_alive(getattr(args, "keep_alive", None)),
+            num_ctx=getattr(args, "num_ctx", None),
+            parallel=getattr(args, "parallel", None),
+            preload=getattr(args, "preload", False),
         )
         return OllamaProvider(config, ollama_config)
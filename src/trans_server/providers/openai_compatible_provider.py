@@ -2,9 +2,11 @@
 
 import argparse
 from dataclasses import dataclass
+import openai
 from openai import OpenAI
 from ..data_models import ProviderConfig
 from ..mods.prompt_builder import PromptBuilder
+from ..utils.http_transport import HttpTransport
 from .openai_provider import OpenAIProvider, OpenAIConfig
 
 
@@ -20,6 +22,9 @@ class OpenAICompatibleConfig:
 class OpenAICompatibleProvider(OpenAIProvider):
     """OpenAI-compatible provider (Azure OpenAI, LocalAI, etc.)"""
 
+    # Most compatible services only understand the classic parameter name
+    MAX_TOKENS_PARAM = "max_tokens"
+
     def __init__(self, config: ProviderConfig, openai_config: OpenAICompatibleConfig):
         # Initialize with dummy OpenAIConfig to satisfy parent __init__
         dummy_config = OpenAIConfig(
@@ -37,8 +42,9 @@ class OpenAICompatibleProvider(OpenAIProvider):
             api_key=openai_config.api_key if openai_config.api_key else "sk-no-key-required",
             base_url=openai_config.api_base,
             organization=openai_config.organization,
+            **HttpTransport.sdk_options(config.transport, openai),
         )
-        self.prompt_builder = PromptBuilder()
+        self.prompt_builder = PromptBuilder(config.prompt_profile)
 
     @staticmethod
     def add_provider_args(parser: argparse.ArgumentParser) -> None:
@@ -50,13 +56,7 @@ class OpenAICompatibleProvider(OpenAIProvider):
     @staticmethod
     def create_from_args(args: argparse.Namespace) -> "OpenAICompatibleProvider":
         """Create provider instance from arguments"""
-        config = ProviderConfig(
-            provider=args.provider,
-            model=args.model,
-            summary=args.summary,
-            fallback_src_lang=args.fallback_from,
-            fallback_dst_lang=args.fallback_to,
-        )
+        config = ProviderConfig.from_args(args)
         openai_config = OpenAICompatibleConfig(
             api_key=args.api_key,
             api_base=args.api_base,
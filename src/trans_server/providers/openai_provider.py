@@ -2,9 +2,12 @@
 
 import argparse
 from dataclasses import dataclass
-from openai import OpenAI
+import openai
+from openai import NOT_GIVEN, OpenAI
 from ..data_models import ProviderConfig
 from ..mods.prompt_builder import PromptBuilder
+from ..utils.http_transport import HttpTransport
+from ..utils.usage import report_usage
 from .base_provider import BaseProvider
 
 
@@ -19,6 +22,11 @@ class OpenAIConfig:
 class OpenAIProvider(BaseProvider):
     """OpenAI provider"""
 
+    # Output limit parameter name (the official API replaced max_tokens with max_completion_tokens)
+    MAX_TOKENS_PARAM = "max_completion_tokens"
+    # Reasoning models count reasoning tokens against max_completion_tokens and reject stop and temperature
+    REASONING_MODEL_PREFIXES = ("o1", "o3", "o4", "gpt-5")
+
     def __init__(self, config: ProviderConfig, openai_config: OpenAIConfig):
         super().__init__(config)
         self.openai_config = openai_config
@@ -27,8 +35,13 @@ class OpenAIProvider(BaseProvider):
         client_args = {"api_key": openai_config.api_key}
         if openai_config.organization:
             client_args["organization"] = openai_config.organization
-        self.client = OpenAI(**client_args)  # type: ignore[arg-type]
-        self.prompt_builder = PromptBuilder()
+        self.client = OpenAI(**client_args, **HttpTransport.sdk_options(config.transport, openai))  # type: ignore[arg-type]
+        self.prompt_builder = PromptBuilder(config.prompt_profile)
+
+    @property
+    def reasoning_model(self) -> bool:
+        """Whether the model is an OpenAI reasoning model (o-series, gpt-5)"""
+        return self.config.model.lower().startswith(self.REASONING_MODEL_PREFIXES)
 
     def list_models(self) -> list[str]:
         """Get available models"""
@@ -50,20 +63,29 @@ class OpenAIProvider(BaseProvider):
         system_prompt = self.prompt_builder.build_system_prompt(self.config.summary)
         user_prompt = self.prompt_builder.build_translation_request(text, src_lang, dst_lang)
 
-        # API call
-        response = self.client.chat.completions.create(
-            model=self.config.model,
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            temperature=0.3,
-        )
+        def request(max_tokens: int) -> tuple[str, bool]:
+            # API call
+            response = self.client.chat.completions.create(
+                model=self.config.model,
+                messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+                temperature=NOT_GIVEN if self.reasoning_model else 0.3,
+                stop=self.stop_sequences or NOT_GIVEN,
+                **{self.MAX_TOKENS_PARAM: max_tokens},
+            )
+
+            if response.usage:
+                details = response.usage.prompt_tokens_details
+                report_usage(response.usage.prompt_tokens, response.usage.completion_tokens, details.cached_tokens if details else None)
+
+            choice = response.choices[0]
+            if choice.finish_reason == "length":
+                return choice.message.content or "", True
+            if not choice.message.content:
+                raise ValueError("Empty response from OpenAI API")
+            return choice.message.content, False
 
         # Extract translation
-        content = response.choices[0].message.content
-        if not content:
-            raise ValueError("Empty response from OpenAI API")
-        translation = self.prompt_builder.extract_translation(content)
-
-        return translation
+        return self.generate_translation(text, src_lang, dst_lang, request)
 
     @staticmethod
     def add_provider_args(parser: argparse.ArgumentParser) -> None:
@@ -74,13 +96,7 @@ class OpenAIProvider(BaseProvider):
     @staticmethod
     def create_from_args(args: argparse.Namespace) -> "OpenAIProvider":
         """Create provider instance from arguments"""
-        config = ProviderConfig(
-            provider=args.provider,
-            model=args.model,
-            summary=args.summary,
-            fallback_src_lang=args.fallback_from,
-            fallback_dst_lang=args.fallback_to,
-        )
+        config = ProviderConfig.from_args(args)
         openai_config = OpenAIConfig(
             api_key=args.api_key,
             organization=getattr(args, "organization", None),
@@ -0,0 +1,48 @@
+"""Lazy provider registry."""
+
+import importlib
+from importlib.metadata import entry_points
+from typing import Type
+from .base_provider import BaseProvider
+
+# プロバイダ名 -> (モジュール, クラス名, 必要なパッケージ)
+# 選択されたプロバイダのモジュールだけを読み込み、他のSDKはimportしない
+BUILTIN_PROVIDERS: dict[str, tuple[str, str, str]] = {
+    "openai": (".openai_provider", "OpenAIProvider", "openai"),
+    "openai-compatible": (".openai_compatible_provider", "OpenAICompatibleProvider", "openai"),
+    "anthropic": (".anthropic_provider", "AnthropicProvider", "anthropic"),
+    "anthropic-compatible": (".anthropic_compatible_provider", "AnthropicCompatibleProvider", "anthropic"),
+    "ollama": (".ollama_provider", "OllamaProvider", "ollama"),
+    "gemini": (".gemini_provider", "GeminiProvider", "google-genai"),
+}
+
+# 外部パッケージが独自のプロバイダを登録するエントリポイントのグループ
+# 例: [project.entry-points."trans_server.providers"] my-provider = "my_package.provider:MyProvider"
+ENTRY_POINT_GROUP = "trans_server.providers"
+
+
+def available_providers() -> list[str]:
+    """選択可能なプロバイダ名 (組み込み + エントリポイント)"""
+    names = list(BUILTIN_PROVIDERS)
+    names.extend(entry.name for entry in entry_points(group=ENTRY_POINT_GROUP) if entry.name not in BUILTIN_PROVIDERS)
+    return names
+
+
+def get_provider_class(provider_name: str) -> Type[BaseProvider]:
+    """Get provider class from provider name (imports only that provider's SDK)"""
+    name = provider_name.lower()
+
+    builtin = BUILTIN_PROVIDERS.get(name)
+    if builtin:
+        module_name, class_name, package = builtin
+        try:
+            module = importlib.import_module(module_name, __package__)
+        except ImportError as e:
+            raise ImportError(f"Provider '{name}' requires the {package} package: pip install {package}. Error: {e}") from e
+        return getattr(module, class_name)
+
+    for entry in entry_points(group=ENTRY_POINT_GROUP):
+        if entry.name == name:
+            return entry.load()
+
+    raise ValueError(f"Unsupported provider: {provider_name}")
@@ -0,0 +1,103 @@
+"""Inspect, search, invalidate and compact the shared translation cache."""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from ..data_models.tenant_profile import namespace_of, profile_of
+from ..mods.translation_cache import SqliteTranslationCache
+
+
+def print_stats(cache: SqliteTranslationCache, as_json: bool):
+    """プロファイル・言語ペア・版ごとの件数とヒット数を表示"""
+    groups = sorted(cache.summary(), key=lambda group: (group["namespace"], group["from"], group["to"], -group["entries"]))
+    if as_json:
+        print(json.dumps([{"profile": profile_of(group.pop("namespace")), **group} for group in groups], ensure_ascii=False, indent=2))
+        return
+    print(f"{'profile':<16}{'pair':<12}{'version':<16}{'entries':>10}{'hits':>10}{'expired':>10}")
+    for group in groups:
+        version = group["version"] if group["version"] is not None else "(invalidated)"
+        print(
+            f"{profile_of(group['namespace']):<16}{group['from'] + '-' + group['to']:<12}{version or '(legacy)':<16}"
+            f"{group['entries']:>10}{group['hits']:>10}{group['expired']:>10}"
+        )
+
+
+def print_entries(entries: list[dict], as_json: bool):
+    """検索結果を表示"""
+    if as_json:
+        print(json.dumps([{"profile": profile_of(entry.pop("namespace")), **entry} for entry in entries], ensure_ascii=False, indent=2))
+        return
+    for entry in entries:
+        text = entry["text"].replace("\n", "\\n")
+        translation = entry["translation"].replace("\n", "\\n")
+        print(f"[{profile_of(entry['namespace'])} {entry['from']}-{entry['to']} hits={entry['hits']} version={entry['version']}] {text} => {translation}")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Administer the shared SQLite translation cache (--cache-path); safe to run while the server is running",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Entries, hits and expired entries per profile, language pair and version
+  python -m trans_server.tools.cache_admin --cache translations.db stats
+
+  # Search source or translated text (glob, case sensitive)
+  python -m trans_server.tools.cache_admin --cache translations.db search "*HP*" --profile rpg
+
+  # Invalidate a language pair (re-translated by --retranslate, removed by compact)
+  python -m trans_server.tools.cache_admin --cache translations.db invalidate --from ja --to en
+
+  # Remove invalidated and expired entries and shrink the file
+  python -m trans_server.tools.cache_admin --cache translations.db compact --vacuum
+        """,
+    )
+    parser.add_argument("--cache", required=True, help="SQLite cache file written by --cache-path")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="Entries, hits and expired entries per profile, language pair and version")
+
+    search = commands.add_parser("search", help="Search cached translations, most hit first")
+    search.add_argument("pattern", nargs="?", help="Glob matched against the source or translated text (e.g., '*HP*')")
+    search.add_argument("--limit", type=int, default=50, help="Maximum number of entries (default: 50)")
+
+    invalidate = commands.add_parser("invalidate", help="Invalidate matching translations")
+    invalidate.add_argument("--pattern", help="Glob matched against the source or translated text")
+
+    compact = commands.add_parser("compact", help="Remove invalidated and expired translations")
+    compact.add_argument("--vacuum", action="store_true", help="Also shrink the file (blocks writers while it runs)")
+
+    for command in (search, invalidate):
+        command.add_argument("--profile", help="Profile name (default profile: default)")
+        command.add_argument("--from", dest="src_lang", help="Source language code")
+        command.add_argument("--to", dest="dst_lang", help="Target language code")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.cache):
+        parser.error(f"Cache file not found: {args.cache}")
+
+    try:
+        cache = SqliteTranslationCache(args.cache)
+        if args.command == "stats":
+            print_stats(cache, args.json)
+        elif args.command == "search":
+            namespace = namespace_of(args.profile) if args.profile else None
+            print_entries(cache.search(args.pattern, namespace, args.src_lang, args.dst_lang, args.limit), args.json)
+        elif args.command == "invalidate":
+            if not (args.profile or args.src_lang or args.dst_lang or args.pattern):
+                parser.error("invalidate requires at least one of --profile, --from, --to or --pattern")
+            namespace = namespace_of(args.profile) if args.profile else None
+            print(f"Invalidated {cache.invalidate(namespace, args.src_lang, args.dst_lang, args.pattern)} entries")
+        else:
+            print(f"Removed {cache.compact(vacuum=args.vacuum)} entries")
+    except sqlite3.Error as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
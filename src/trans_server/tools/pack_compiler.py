@@ -0,0 +1,101 @@
+"""Compile cached and XUnity translations into a translation pack."""
+
+import argparse
+import sqlite3
+import sys
+import time
+from typing import Iterator, Optional
+from ..data_models.tenant_profile import DEFAULT_PROFILE, namespace_of
+from ..mods.translation_pack import TranslationPack
+
+XUNITY_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "=": "=", "\\": "\\"}
+
+
+def split_xunity_line(line: str) -> Optional[tuple[str, str]]:
+    """XUnity の翻訳ファイルの1行を (原文, 訳文) に分割 (エスケープされていない最初の '=' で区切る)"""
+    parts: list[list[str]] = [[]]
+    chars = iter(line)
+    for char in chars:
+        if char == "\\":
+            escaped = next(chars, "")
+            parts[-1].append(XUNITY_ESCAPES.get(escaped, "\\" + escaped))
+        elif char == "=" and len(parts) == 1:
+            parts.append([])
+        else:
+            parts[-1].append(char)
+    if len(parts) != 2:
+        return None
+    return "".join(parts[0]), "".join(parts[1])
+
+
+def read_xunity_file(path: str, src_lang: str, dst_lang: str) -> Iterator[tuple[str, str, str, str]]:
+    """XUnity の翻訳ファイル (_AutoGeneratedTranslations.txt など) を読み込む"""
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            # コメントと正規表現による置換は対象外
+            if not line or line.startswith("//") or line.startswith(("r:", "sr:")):
+                continue
+            pair = split_xunity_line(line)
+            if pair and pair[0] and pair[1]:
+                yield src_lang, dst_lang, pair[0], pair[1]
+
+
+def read_cache_file(path: str, namespace: str = "") -> Iterator[tuple[str, str, str, str]]:
+    """共有キャッシュ (--cache-path の SQLite) の1つの名前空間の有効な翻訳を古い順に読み込む"""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        yield from conn.execute(
+            "SELECT src_lang, dst_lang, text, translation FROM translations WHERE namespace = ? AND version IS NOT NULL "
+            "AND (expires_at IS NULL OR expires_at > ?) ORDER BY updated_at",
+            (namespace, time.time()),
+        )
+    finally:
+        conn.close()
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Compile translations into a memory-mapped translation pack (--pack)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # From the shared cache of a running server
+  XUnity_Translate_Pack --cache translations.db -o game.pack
+
+  # From XUnity translation files (later inputs override earlier ones)
+  XUnity_Translate_Pack --xunity Translation/en/Text/_AutoGeneratedTranslations.txt --from ja --to en -o game.pack
+        """,
+    )
+    parser.add_argument("-o", "--output", required=True, help="Output pack file")
+    parser.add_argument("--cache", action="append", default=[], help="SQLite cache file written by --cache-path (repeatable)")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Profile whose translations are read from --cache (default: default)")
+    parser.add_argument("--xunity", action="append", default=[], help="XUnity translation file (key=value lines, repeatable)")
+    parser.add_argument("--from", dest="src_lang", help="Source language code of the XUnity files (e.g., ja)")
+    parser.add_argument("--to", dest="dst_lang", help="Target language code of the XUnity files (e.g., en)")
+    args = parser.parse_args()
+
+    if not args.cache and not args.xunity:
+        parser.error("At least one --cache or --xunity input is required")
+    if args.xunity and not (args.src_lang and args.dst_lang):
+        parser.error("--from and --to are required with --xunity")
+
+    namespace = namespace_of(args.profile)
+
+    def translations() -> Iterator[tuple[str, str, str, str]]:
+        for path in args.cache:
+            yield from read_cache_file(path, namespace)
+        for path in args.xunity:
+            yield from read_xunity_file(path, args.src_lang, args.dst_lang)
+
+    try:
+        count = TranslationPack.write(args.output, translations())
+    except (OSError, sqlite3.Error, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Wrote {count} translations to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
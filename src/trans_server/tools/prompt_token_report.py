@@ -0,0 +1,102 @@
+"""Compare prompt token counts between prompt profiles."""
+
+import argparse
+import importlib.util
+import json
+import statistics
+import sys
+from typing import Callable, Optional
+from ..mods.prompt_builder import PromptBuilder
+from ..utils.token_estimator import TokenEstimator
+
+# OpenAI・Anthropic の自動/明示的なプロンプトキャッシュと Gemini の明示的なキャッシュが対象とする最小トークン数
+PROMPT_CACHE_MIN_TOKENS = 1024
+
+# 代表的なゲーム内テキスト (ラベル・台詞・説明文・タグ付き)
+SAMPLE_STRINGS = [
+    "はい",
+    "戻る",
+    "攻撃力",
+    "セーブしました",
+    "アイテムを使いますか？",
+    "HP が 10 回復した",
+    "<color=#FF0000>警告</color>",
+    "「ここから先は危険だ。準備はいいか？」",
+    "「……あなたは、誰？」\n「名乗るほどの者じゃないさ」",
+    "この剣は古代の鍛冶師によって鍛えられた。\n攻撃時、一定確率で敵を麻痺させる。",
+    "村の北にある洞窟には、かつて竜が住んでいたという。\n今では誰も近づかないが、夜になると奇妙な光が見えるらしい。\n村長は何か知っているようだ。",
+]
+
+
+def load_counter(encoding: Optional[str]) -> tuple[str, Callable[[str], int]]:
+    """トークン数の数え方 (tiktoken があれば実際のトークナイザ、なければ概算)"""
+    if encoding and importlib.util.find_spec("tiktoken") is not None:
+        import tiktoken  # pylint: disable=import-outside-toplevel
+
+        tokenizer = tiktoken.get_encoding(encoding)
+        return f"tiktoken {encoding}", lambda text: len(tokenizer.encode(text))
+    if encoding:
+        print("tiktoken is not installed (pip install tiktoken), using the built-in estimate", file=sys.stderr)
+    return "estimate", TokenEstimator.estimate
+
+
+def load_strings(path: str) -> list[str]:
+    """1行1件のテキストファイルを読み込む (\\n は改行として扱う)"""
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\r\n").replace("\\n", "\n") for line in f if line.strip()]
+
+
+def measure(profile: str, strings: list[str], src_lang: str, dst_lang: str, summary: Optional[str], count: Callable[[str], int]) -> dict:
+    """1つのプロファイルのトークン数を計測"""
+    builder = PromptBuilder(profile)
+    system_tokens = count(builder.build_system_prompt(summary))
+    request_tokens = [count(builder.build_translation_request(text, src_lang, dst_lang)) for text in strings]
+    average_request = statistics.mean(request_tokens)
+    return {
+        "profile": profile,
+        "system_tokens": system_tokens,
+        "avg_request_tokens": round(average_request, 1),
+        "max_request_tokens": max(request_tokens),
+        # システムプロンプトは毎回送られる (プロンプトキャッシュの最小トークン数に満たなければキャッシュもされない)
+        "avg_total_tokens": round(system_tokens + average_request, 1),
+        "system_prompt_cacheable": system_tokens >= PROMPT_CACHE_MIN_TOKENS,
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Compare the input tokens of each prompt profile over representative game strings")
+    parser.add_argument("--strings", help="Text file with one string per line (\\n for line breaks, default: built-in samples)")
+    parser.add_argument("--from", dest="src_lang", default="ja", help="Source language code (default: ja)")
+    parser.add_argument("--to", dest="dst_lang", default="en", help="Target language code (default: en)")
+    parser.add_argument("--summary", help="Application summary added to the system prompt")
+    parser.add_argument("--encoding", default="o200k_base", help="tiktoken encoding (default: o200k_base, falls back to an estimate without tiktoken)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    strings = load_strings(args.strings) if args.strings else SAMPLE_STRINGS
+    counter_name, count = load_counter(args.encoding)
+    results = [measure(profile, strings, args.src_lang, args.dst_lang, args.summary, count) for profile in PromptBuilder.PROFILES]
+
+    if args.json:
+        print(json.dumps({"counter": counter_name, "strings": len(strings), "profiles": results}, indent=2))
+        return
+
+    print(f"{len(strings)} strings, {args.src_lang} -> {args.dst_lang}, counted with {counter_name}")
+    print(f"{'profile':<10}{'system':>8}{'avg req':>10}{'max req':>10}{'avg total':>12}")
+    for result in results:
+        print(
+            f"{result['profile']:<10}{result['system_tokens']:>8}{result['avg_request_tokens']:>10}{result['max_request_tokens']:>10}"
+            f"{result['avg_total_tokens']:>12}"
+        )
+
+    baseline = results[0]
+    for result in results[1:]:
+        total = 1 - result["avg_total_tokens"] / baseline["avg_total_tokens"]
+        print(f"{result['profile']} vs {baseline['profile']}: {total:.0%} fewer input tokens per request")
+    if not any(result["system_prompt_cacheable"] for result in results):
+        print(f"System prompts are below the {PROMPT_CACHE_MIN_TOKENS}-token minimum for provider prompt caching, so they are billed on every request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Measure cold start time and memory per provider."""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from ..providers.registry import available_providers
+
+# 子プロセスで実行する計測コード (importの時間とピークメモリを出力)
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import trans_server.main
+from trans_server.providers.registry import get_provider_class
+get_provider_class(sys.argv[1])
+elapsed = time.perf_counter() - start
+try:
+    import resource
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak_rss_kb //= 1024
+except ImportError:
+    peak_rss_kb = None
+sdks = sorted(name for name in ("openai", "anthropic", "ollama", "google.genai") if name in sys.modules)
+print(json.dumps({"import_seconds": elapsed, "peak_rss_kb": peak_rss_kb, "sdks": sdks}))
+"""
+
+
+def measure(provider_name: str, runs: int) -> dict:
+    """1つのプロバイダについて、新しいプロセスでの起動を runs 回計測"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", PROBE, provider_name], capture_output=True, text=True, check=False)
+        wall = time.perf_counter() - start
+        if result.returncode != 0:
+            return {"provider": provider_name, "error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+        sample = json.loads(result.stdout)
+        sample["wall_seconds"] = wall
+        samples.append(sample)
+
+    rss = [sample["peak_rss_kb"] for sample in samples if sample["peak_rss_kb"] is not None]
+    return {
+        "provider": provider_name,
+        "import_seconds": round(statistics.median(sample["import_seconds"] for sample in samples), 3),
+        "wall_seconds": round(statistics.median(sample["wall_seconds"] for sample in samples), 3),
+        "peak_rss_mb": round(statistics.median(rss) / 1024, 1) if rss else None,
+        "sdks": samples[0]["sdks"],
+    }
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description="Measure cold start time and peak memory of the server for each provider")
+    parser.add_argument("--provider", action="append", help="Provider to measure (repeatable, default: all)")
+    parser.add_argument("--runs", type=int, default=5, help="Process starts per provider, the median is reported (default: 5)")
+    parser.add_argument("--budget", type=float, help="Exit with status 1 if any provider's median wall time exceeds this many seconds")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(name, args.runs) for name in (args.provider or available_providers())]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'provider':<22}{'import':>10}{'wall':>10}{'peak RSS':>12}  SDKs loaded")
+        for result in results:
+            if "error" in result:
+                print(f"{result['provider']:<22}  error: {result['error']}")
+                continue
+            rss = f"{result['peak_rss_mb']}MB" if result["peak_rss_mb"] is not None else "-"
+            print(f"{result['provider']:<22}{result['import_seconds']:>9.3f}s{result['wall_seconds']:>9.3f}s{rss:>12}  {', '.join(result['sdks']) or '-'}")
+
+    if args.budget is not None:
+        over = [result["provider"] for result in results if "error" in result or result["wall_seconds"] > args.budget]
+        if over:
+            print(f"Startup budget of {args.budget:.2f}sec exceeded: {', '.join(over)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
 """Utilities for translation server."""
 
+from .http_transport import HttpTransport
 from .language_mapper import LanguageMapper
+from .profiler import Profiler
+from .token_estimator import TokenEstimator
+from .tracing import Tracer, span
 
-__all__ = ["LanguageMapper"]
+__all__ = ["HttpTransport", "LanguageMapper", "Profiler", "TokenEstimator", "Tracer", "span"]
@@ -0,0 +1,106 @@
+"""HTTP client construction for provider SDKs."""
+
+import importlib.util
+import time
+from types import ModuleType
+from typing import Any
+import httpx
+from ..data_models.transport_config import TransportConfig
+from .tracing import is_sampled, record_span
+
+
+class ConnectTimeoutClient(httpx.Client):
+    """リクエストごとの単一のタイムアウト秒数を、接続タイムアウトを分けた httpx.Timeout に置き換えるクライアント
+
+    google-genai はリクエストごとに HttpOptions.timeout (秒数1つ) を渡し、クライアントのタイムアウト設定を上書きするため。
+    """
+
+    def __init__(self, connect_timeout: float, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.connect_timeout = connect_timeout
+
+    def build_request(self, *args: Any, **kwargs: Any) -> httpx.Request:
+        """数値のタイムアウトは読み込み等に使い、接続だけ connect_timeout にする"""
+        timeout = kwargs.get("timeout")
+        if isinstance(timeout, (int, float)):
+            kwargs["timeout"] = httpx.Timeout(timeout, connect=self.connect_timeout)
+        return super().build_request(*args, **kwargs)
+
+
+class HttpTransport:
+    """TransportConfig からプロバイダSDK用のHTTPクライアント引数を構築"""
+
+    _http2_warning_shown = False
+
+    @classmethod
+    def http2_enabled(cls, transport: TransportConfig) -> bool:
+        """HTTP/2 が使えるか (h2 パッケージがなければ警告してHTTP/1.1にする)"""
+        if not transport.http2:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            if not cls._http2_warning_shown:
+                print("HTTP/2 requires the h2 package (pip install httpx[http2]). Falling back to HTTP/1.1.")
+                cls._http2_warning_shown = True
+            return False
+        return True
+
+    @staticmethod
+    def _trace_request(http_request: Any):
+        """送信直前の時刻を記録 (サンプリング対象のリクエストのみ)"""
+        if is_sampled():
+            http_request.extensions["trace_start_ns"] = time.perf_counter_ns()
+
+    @staticmethod
+    def _trace_response(http_response: Any):
+        """応答ヘッダー受信までを http 区間として記録 (送信前との差がSDKのシリアライズ時間)"""
+        start_ns = http_response.request.extensions.get("trace_start_ns")
+        if start_ns is not None:
+            record_span("http", start_ns, time.perf_counter_ns(), status=http_response.status_code, host=http_response.request.url.host)
+
+    @classmethod
+    def event_hooks(cls) -> dict[str, list]:
+        """トレース用のHTTPイベントフック (同期クライアント用)"""
+        return {"request": [cls._trace_request], "response": [cls._trace_response]}
+
+    @classmethod
+    def httpx_options(cls, transport: TransportConfig) -> dict[str, Any]:
+        """httpx.Client に渡す引数 (Ollama / Gemini 用)"""
+        return {
+            "timeout": httpx.Timeout(transport.read_timeout, connect=transport.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=transport.max_connections,
+                max_keepalive_connections=transport.max_keepalive_connections,
+                keepalive_expiry=transport.keepalive_expiry,
+            ),
+            "http2": cls.http2_enabled(transport),
+            "event_hooks": cls.event_hooks(),
+        }
+
+    @classmethod
+    def sdk_options(cls, transport: TransportConfig, sdk: ModuleType) -> dict[str, Any]:
+        """OpenAI / Anthropic クライアントに渡す引数
+
+        SDKによって内部のHTTPライブラリが異なるため、SDKが公開している型で構築する。
+        SDKのtimeoutはリクエストごとにHTTPクライアントの設定を上書きするため、両方に同じ値を渡す。
+        """
+        timeout = sdk.Timeout(transport.read_timeout, connect=transport.connect_timeout)
+        limits = type(sdk.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=transport.max_connections,
+            max_keepalive_connections=transport.max_keepalive_connections,
+            keepalive_expiry=transport.keepalive_expiry,
+        )
+        http_client = sdk.DefaultHttpxClient(timeout=timeout, limits=limits, http2=cls.http2_enabled(transport), event_hooks=cls.event_hooks())
+        return {"http_client": http_client, "timeout": timeout, "max_retries": transport.max_retries}
+
+    @classmethod
+    def genai_options(cls, transport: TransportConfig) -> dict[str, Any]:
+        """google-genai の HttpOptions に渡す引数
+
+        SDKはリクエストごとに timeout (ミリ秒) だけを渡すため、接続タイムアウトはクライアント側で分けて適用する。
+        """
+        client_args = cls.httpx_options(transport)
+        client_args.pop("timeout")
+        return {
+            "timeout": int(transport.read_timeout * 1000),
+            "httpx_client": ConnectTimeoutClient(transport.connect_timeout, **client_args),
+        }
@@ -0,0 +1,179 @@
+"""In-process CPU and memory profiling for a running server."""
+
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from types import FrameType
+from typing import Iterator, Optional
+
+# Python 3.12以降の cProfile は sys.monitoring を使い、1つのプロファイラで全スレッドを計測する (同時に1つしか有効にできない)
+PROCESS_WIDE_CPROFILE = sys.version_info >= (3, 12)
+
+
+class ProfilerBusyError(RuntimeError):
+    """別のプロファイリングが実行中"""
+
+
+class Profiler:
+    """稼働中のサーバーをその場でプロファイリングする
+
+    - sample: 全スレッドのスタックを一定間隔で採取し、flamegraph.pl / speedscope 形式 (folded stacks) で返す
+    - cprofile: 期間中に処理したリクエストを cProfile で計測し、pstats 形式で返す
+    - memory: tracemalloc のスナップショットを取り、前回との差分を返す
+    """
+
+    MAX_SECONDS = 300.0
+    # 待機中とみなすスレッドの末端フレーム (既定ではサンプルから除外)
+    IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "socketserver.py")
+    IDLE_FUNCTIONS = ("_worker",)
+
+    def __init__(self):
+        self._session_lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+        self._stats_lock = threading.Lock()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _clamp(self, seconds: float) -> float:
+        return max(0.1, min(seconds, self.MAX_SECONDS))
+
+    @contextmanager
+    def _session(self) -> Iterator[None]:
+        """同時に1つだけ計測する"""
+        if not self._session_lock.acquire(blocking=False):
+            raise ProfilerBusyError("Another profiling session is running")
+        try:
+            yield
+        finally:
+            self._session_lock.release()
+
+    @staticmethod
+    def _frame_label(frame: FrameType) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _is_idle(self, frame: FrameType) -> bool:
+        return frame.f_code.co_filename.endswith(self.IDLE_FILES) or frame.f_code.co_name in self.IDLE_FUNCTIONS
+
+    def sample(self, seconds: float, interval: float = 0.005, include_idle: bool = False) -> str:
+        """スタックを seconds 秒間サンプリングし、folded stacks 形式 ("a;b;c 回数" の行) で返す"""
+        seconds = self._clamp(seconds)
+        counts: Counter[str] = Counter()
+        own_thread = threading.get_ident()
+
+        with self._session():
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                    if thread_id == own_thread or (not include_idle and self._is_idle(frame)):
+                        continue
+                    stack = []
+                    current: Optional[FrameType] = frame
+                    while current is not None:
+                        stack.append(self._frame_label(current))
+                        current = current.f_back
+                    stack.append(names.get(thread_id, str(thread_id)))
+                    counts[";".join(reversed(stack))] += 1
+                time.sleep(interval)
+
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    @contextmanager
+    def profile_request(self) -> Iterator[None]:
+        """cprofile の計測中ならリクエストの処理を cProfile で計測 (計測中でなければ何もしない)
+
+        計測を開始できないとき (他のプロファイラが有効など) は、リクエストを失敗させずに計測だけを省く。
+        """
+        if self._stats is None or PROCESS_WIDE_CPROFILE:
+            yield
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._stats_lock:
+                if self._stats is not None:
+                    self._stats.add(profile)
+
+    def cprofile(self, seconds: float) -> bytes:
+        """seconds 秒間に処理したリクエストを cProfile で計測し、pstats ファイルの内容を返す
+
+        Python 3.11以前の cProfile はスレッドごとに動くため、リクエスト処理スレッドごとに計測して合算する。
+        3.12以降はプロセス全体を1つのプロファイラで計測する (バックグラウンドスレッドも含まれる)。
+        """
+        seconds = self._clamp(seconds)
+        with self._session():
+            if PROCESS_WIDE_CPROFILE:
+                profile = cProfile.Profile()
+                try:
+                    profile.enable()
+                except ValueError as e:
+                    raise ProfilerBusyError(str(e)) from e
+                try:
+                    time.sleep(seconds)
+                finally:
+                    profile.disable()
+                stats = pstats.Stats(profile)
+            else:
+                with self._stats_lock:
+                    self._stats = pstats.Stats()
+                try:
+                    time.sleep(seconds)
+                finally:
+                    with self._stats_lock:
+                        stats, self._stats = self._stats, None
+        # pstats.Stats.dump_stats と同じ形式 (pstats.Stats(path) や snakeviz で読める)
+        return marshal.dumps(stats.stats)  # type: ignore[attr-defined]
+
+    def memory_snapshot(self, limit: int = 30, key_type: str = "lineno", frames: int = 1) -> str:
+        """tracemalloc のスナップショットを取り、上位の確保箇所と前回のスナップショットからの差分を返す
+
+        初回の呼び出しで tracemalloc を開始する (開始前の確保は計測されない)。
+        """
+        if key_type not in ("lineno", "filename", "traceback"):
+            raise ValueError(f"Unsupported key type: {key_type}")
+
+        with self._session():
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(max(1, frames))
+                self._snapshot = None
+                return f"tracemalloc started ({max(1, frames)} frames). Take another snapshot to see allocations.\n"
+
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                )
+            )
+            current, peak = tracemalloc.get_traced_memory()
+            lines = [f"Traced memory: current={current / 1024 / 1024:.1f}MB peak={peak / 1024 / 1024:.1f}MB", ""]
+
+            lines.append(f"Top {limit} allocations by {key_type}:")
+            lines.extend(str(stat) for stat in snapshot.statistics(key_type)[:limit])
+
+            if self._snapshot is not None:
+                lines.extend(["", f"Top {limit} differences since the previous snapshot:"])
+                lines.extend(str(stat) for stat in snapshot.compare_to(self._snapshot, key_type)[:limit])
+            self._snapshot = snapshot
+
+        return "\n".join(lines) + "\n"
+
+    def memory_stop(self):
+        """tracemalloc を停止してスナップショットを破棄"""
+        with self._session():
+            tracemalloc.stop()
+            self._snapshot = None
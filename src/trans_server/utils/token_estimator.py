@@ -0,0 +1,59 @@
+"""Approximate token counting without a tokenizer."""
+
+import math
+
+
+class TokenEstimator:
+    """トークナイザを使わずにトークン数を概算
+
+    主要なLLMのトークナイザのおおよその傾向に合わせた推定:
+    - ASCII: 約4文字で1トークン
+    - その他のアルファベット系 (アクセント付きラテン文字、キリル文字など): 約2文字で1トークン
+    - CJK・かな・ハングルなどの全角文字: 1文字で約1トークン
+    """
+
+    ASCII_CHARS_PER_TOKEN = 4.0
+    ALPHABETIC_CHARS_PER_TOKEN = 2.0
+    WIDE_CHAR_START = 0x2E80  # CJK部首補助以降を全角文字として扱う
+
+    # 1文字あたりのトークン数が多い (全角文字・複雑な文字体系を使う) 言語
+    WIDE_SCRIPT_LANGUAGES = {"ja", "zh", "yue", "ko", "th", "lo", "km", "my", "am", "si"}
+    OUTPUT_RATIO = 2.0  # 入力トークン数に対する出力予算の倍率
+    OUTPUT_RATIO_TO_WIDE = 3.0  # 全角系言語へ翻訳する場合の倍率 (英語など→日本語は膨らみやすい)
+    OUTPUT_OVERHEAD_TOKENS = 16  # <translate>タグと余裕分
+    MIN_OUTPUT_TOKENS = 64
+
+    @classmethod
+    def estimate(cls, text: str) -> int:
+        """テキストのトークン数を概算"""
+        if not text:
+            return 0
+
+        ascii_chars = 0
+        alphabetic_chars = 0
+        wide_chars = 0
+        for char in text:
+            code = ord(char)
+            if code < 0x80:
+                ascii_chars += 1
+            elif code < cls.WIDE_CHAR_START:
+                alphabetic_chars += 1
+            else:
+                wide_chars += 1
+
+        tokens = ascii_chars / cls.ASCII_CHARS_PER_TOKEN + alphabetic_chars / cls.ALPHABETIC_CHARS_PER_TOKEN + wide_chars
+        return max(1, math.ceil(tokens))
+
+    @classmethod
+    def _is_wide_script(cls, lang_code: str) -> bool:
+        """全角系言語かどうか (zh-CN などの地域指定は無視)"""
+        return lang_code.split("-")[0].lower() in cls.WIDE_SCRIPT_LANGUAGES
+
+    @classmethod
+    def estimate_output_budget(cls, text: str, src_lang: str, dst_lang: str, maximum: int = 4096) -> int:
+        """入力テキストと言語ペアから出力トークン予算 (max_tokens) を算出"""
+        ratio = cls.OUTPUT_RATIO
+        if cls._is_wide_script(dst_lang) and not cls._is_wide_script(src_lang):
+            ratio = cls.OUTPUT_RATIO_TO_WIDE
+        budget = math.ceil(cls.estimate(text) * ratio) + cls.OUTPUT_OVERHEAD_TOKENS
+        return max(min(cls.MIN_OUTPUT_TOKENS, maximum), min(budget, maximum))
@@ -0,0 +1,209 @@
+"""Lightweight per-request span tracing."""
+
+import json
+import logging
+import logging.handlers
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 処理中のリクエストのトレース (スレッドやasyncioタスクをまたいで引き継ぐ)
+_current: ContextVar[Optional["RequestTrace"]] = ContextVar("trans_server_trace", default=None)
+
+
+class Span:
+    """計測した1区間"""
+
+    __slots__ = ("name", "start_ns", "end_ns", "thread_id", "args")
+
+    def __init__(self, name: str, start_ns: int, end_ns: int, args: dict[str, Any]):
+        self.name = name
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.thread_id = threading.get_ident()
+        self.args = args
+
+    @property
+    def duration_ms(self) -> float:
+        """所要時間 (ミリ秒)"""
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+
+class RequestTrace:
+    """1リクエスト分のトレース (サンプリング対象外なら区間を記録しない)"""
+
+    def __init__(self, name: str, request_id: str, sampled: bool):
+        self.name = name
+        self.request_id = request_id
+        self.sampled = sampled
+        self.started_at = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.spans: list[Span] = []
+
+    def add(self, name: str, start_ns: int, end_ns: int, args: dict[str, Any]):
+        """区間を追加"""
+        self.spans.append(Span(name, start_ns, end_ns, args))
+
+    def breakdown(self) -> str:
+        """区間ごとの所要時間の要約 (ログ出力用、同名の区間は合算)"""
+        totals: dict[str, float] = {}
+        for item in self.spans:
+            if item.name != self.name:
+                totals[item.name] = totals.get(item.name, 0.0) + item.duration_ms
+        return " ".join(f"{name}={duration:.1f}ms" for name, duration in totals.items())
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    """処理区間を計測 (サンプリング対象のリクエスト内でのみ記録)"""
+    trace = _current.get()
+    if trace is None or not trace.sampled:
+        yield
+        return
+    start_ns = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        trace.add(name, start_ns, time.perf_counter_ns(), args)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """関数全体を span で計測するデコレータ"""
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def is_sampled() -> bool:
+    """処理中のリクエストがサンプリング対象か"""
+    trace = _current.get()
+    return trace is not None and trace.sampled
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **args: Any):
+    """開始と終了を別々の場所で取得した区間を記録 (HTTPフックなど)"""
+    trace = _current.get()
+    if trace is not None and trace.sampled:
+        trace.add(name, start_ns, end_ns, args)
+
+
+class Tracer:
+    """リクエストのトレースをサンプリングし、直近の区間を保持・出力する
+
+    保持した区間は Chrome のトレースイベント形式 (chrome://tracing, Perfetto) で取得できる。
+    ログファイルを指定すると、サンプリングしたリクエストを1行1件のJSONでローテーションしながら書き出す。
+    ログファイルは最初の書き込み時に開き、fork したワーカーはプロセスごとのファイル (名前にPIDを付ける) に書き出す。
+    """
+
+    LOG_MAX_BYTES = 10 * 1024 * 1024
+    LOG_BACKUP_COUNT = 3
+
+    def __init__(self, sample_rate: float = 0.0, buffer_size: int = 10000, log_path: Optional[str] = None):
+        self.sample_rate = sample_rate
+        self._spans: deque[tuple[str, Span]] = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._sampled = 0
+        self.log_path = log_path
+        # 複数のプロセスが同じファイルをローテーションしないよう、ログはプロセスごとに開く
+        self._logger: Optional[logging.Logger] = None
+        self._logger_pid: Optional[int] = None
+        self._parent_pid = os.getpid()
+
+    def _open_log(self, log_path: str) -> logging.Logger:
+        """このプロセスのトレースログを開く (fork したワーカーはファイル名にPIDを付ける)"""
+        pid = os.getpid()
+        if pid != self._parent_pid:
+            root, ext = os.path.splitext(log_path)
+            log_path = f"{root}.{pid}{ext}"
+        handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=self.LOG_MAX_BYTES, backupCount=self.LOG_BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger(f"trans_server.trace.{log_path}")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        logger.addHandler(handler)
+        self._logger = logger
+        self._logger_pid = pid
+        return logger
+
+    @contextmanager
+    def request(self, name: str, request_id: Optional[str] = None, **args: Any) -> Iterator[RequestTrace]:
+        """リクエスト全体を計測 (このブロック内の span はすべてこのリクエストに属する)"""
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        trace = RequestTrace(name, request_id or uuid.uuid4().hex[:16], sampled)
+        token = _current.set(trace)
+        try:
+            with span(name, **args):
+                yield trace
+        finally:
+            _current.reset(token)
+            self._finish(trace)
+
+    def _finish(self, trace: RequestTrace):
+        """完了したリクエストの区間を保持・出力"""
+        with self._lock:
+            self._requests += 1
+            if not trace.sampled:
+                return
+            self._sampled += 1
+            self._spans.extend((trace.request_id, item) for item in trace.spans)
+            if not self.log_path:
+                return
+            logger = self._logger if self._logger_pid == os.getpid() else self._open_log(self.log_path)
+
+        record = {
+            "request_id": trace.request_id,
+            "name": trace.name,
+            "started_at": trace.started_at,
+            "spans": [
+                {
+                    "name": item.name,
+                    "offset_ms": round((item.start_ns - trace.start_ns) / 1_000_000, 3),
+                    "duration_ms": round(item.duration_ms, 3),
+                    **item.args,
+                }
+                for item in trace.spans
+            ],
+        }
+        logger.info(json.dumps(record, ensure_ascii=False))
+
+    def chrome_trace(self) -> dict:
+        """保持している区間を Chrome のトレースイベント形式で取得"""
+        with self._lock:
+            spans = list(self._spans)
+        pid = os.getpid()
+        events = [
+            {
+                "name": item.name,
+                "cat": "translate",
+                "ph": "X",
+                "ts": item.start_ns / 1000,
+                "dur": (item.end_ns - item.start_ns) / 1000,
+                "pid": pid,
+                "tid": item.thread_id,
+                "args": {"request_id": request_id, **item.args},
+            }
+            for request_id, item in spans
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def snapshot(self) -> dict:
+        """状態のスナップショット (ヘルスチェック用)"""
+        with self._lock:
+            return {"sample_rate": self.sample_rate, "requests": self._requests, "sampled": self._sampled, "buffered_spans": len(self._spans)}
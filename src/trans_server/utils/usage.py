@@ -0,0 +1,51 @@
+"""Per-call token usage reporting."""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class Usage:
+    """1回の翻訳 (打ち切り時の再試行を含む) で消費したトークン数
+
+    input_tokens はキャッシュから読まれた分 (cached_tokens) を含む。
+    """
+
+    __slots__ = ("calls", "input_tokens", "output_tokens", "cached_tokens")
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cached_tokens = 0
+
+    @property
+    def reported(self) -> bool:
+        """プロバイダが実際のトークン数を報告したか"""
+        return self.calls > 0
+
+
+# 処理中の翻訳の集計先 (プロバイダは呼び出し元を知らずに報告できる)
+_current: ContextVar[Optional[Usage]] = ContextVar("trans_server_usage", default=None)
+
+
+@contextmanager
+def usage_scope() -> Iterator[Usage]:
+    """このブロック内で報告されたトークン数を集計"""
+    usage = Usage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def report_usage(input_tokens: Optional[int], output_tokens: Optional[int], cached_tokens: Optional[int] = None):
+    """APIの応答に含まれるトークン数を報告 (集計中でなければ何もしない)"""
+    usage = _current.get()
+    if usage is None:
+        return
+    usage.calls += 1
+    usage.input_tokens += input_tokens or 0
+    usage.output_tokens += output_tokens or 0
+    usage.cached_tokens += cached_tokens or 0